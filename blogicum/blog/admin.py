@@ -1,5 +1,10 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Category, Location, Post
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Category, Location, Post, Task
+from .search import get_search_backend
 
 
 @admin.register(Category)
@@ -7,6 +12,18 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('title', 'is_published', 'created_at')
     prepopulated_fields = {'slug': ('title',)}
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Ленту категории обновляет фоновая задача (blog.signals):
+        # ход и время её выполнения видны в списке задач
+        task = getattr(obj, '_feed_task', None)
+        if task is not None:
+            url = reverse('admin:blog_task_change', args=(task.pk,))
+            self.message_user(request, format_html(
+                'Лента категории обновляется в фоне: '
+                '<a href="{}">задача #{}</a>.', url, task.pk
+            ))
+
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
@@ -21,6 +38,46 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
         'is_published',
         'category',
-        'location')
+        'location',
+        'comment_count')
     list_filter = ('is_published', 'category', 'location', 'pub_date')
     search_fields = ('title', 'text')
+    readonly_fields = ('comment_count',)
+    actions = ('recount_comments',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем по полнотекстовому индексу, а не LIKE '%...%' по таблице
+        if not search_term:
+            return super().get_search_results(
+                request, queryset, search_term)
+        # Как и на странице поиска — не больше BLOG_SEARCH_MAX_RESULTS:
+        # список ключей уходит в запрос параметрами
+        hits = get_search_backend().search(
+            search_term, limit=settings.BLOG_SEARCH_MAX_RESULTS)
+        return queryset.filter(pk__in=[hit.post_id for hit in hits]), False
+
+    @admin.action(description='Пересчитать число комментариев')
+    def recount_comments(self, request, queryset):
+        updated = queryset.recount_comments()
+        self.message_user(request, f'Пересчитано публикаций: {updated}')
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'status', 'created_at', 'started_at', 'duration', 'attempts'
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = (
+        'name', 'kwargs', 'status', 'error', 'created_at', 'started_at',
+        'finished_at', 'duration', 'attempts'
+    )
+
+    @admin.display(description='Длительность')
+    def duration(self, obj):
+        if obj.started_at is None or obj.finished_at is None:
+            return None
+        return obj.finished_at - obj.started_at
+
+    def has_add_permission(self, request):
+        return False
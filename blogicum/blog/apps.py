@@ -6,3 +6,7 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = _('Блог')
+
+    def ready(self):
+        # Обработчики сигналов и фоновые задачи регистрируются при импорте
+        from . import checks, images, signals  # noqa: F401
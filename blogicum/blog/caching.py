@@ -0,0 +1,244 @@
+"""Кэш и условные GET-запросы для лент и страниц публикаций.
+
+Страница зависит от версий «областей»: ``index`` (главная),
+``category:<slug>``, ``author:<username>``, ``post:<id>`` и общей
+``global``. Сигналы (blog.signals) меняют версии затронутых областей;
+версии хранятся в кэше без вытеснения (blog.state).
+Из версий и даты ближайшей публикации без запросов к базе строятся
+ETag и Last-Modified, а для анонимных пользователей — ключ кэша
+готовой страницы: после изменения старые записи просто не находятся.
+Так же, по версиям, кэшируются отрисованные карточки публикаций.
+
+Для больших лент хранится и приблизительное число публикаций: сигналы
+прибавляют и вычитают публикации, а точный COUNT(*) выполняется, только
+когда счётчика нет или лента невелика.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+
+from .publication import cap_by_next_publication, next_publication
+from .state import state_cache
+
+VERSION_KEY = 'blog:feed:version:{}'
+PAGE_KEY = 'blog:feed:page:{}'
+CARD_KEY = 'blog:card:{}:{}'
+COUNT_KEY = 'blog:feed:count:{}:{}'
+
+GLOBAL_SCOPE = 'global'
+INDEX_SCOPE = 'index'
+
+
+def category_scope(slug):
+    return f'category:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def get_versions(scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = state_cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Версия — время создания, а не счётчик: после очистки
+            # кэша она не совпадёт ни с одной из прежних
+            version = time.time_ns()
+            state_cache.add(key, version, None)
+            # DummyCache не хранит ничего
+            versions[key] = state_cache.get(key) or version
+    return [versions[key] for key in keys]
+
+
+def bump_versions(scopes):
+    now = time.time_ns()
+    state_cache.set_many(
+        {VERSION_KEY.format(scope): now for scope in set(scopes)}, None
+    )
+
+
+def page_timeout():
+    return cap_by_next_publication(settings.BLOG_FEED_CACHE_TIMEOUT)
+
+
+def patch_feed_max_age(response):
+    """Разрешить браузеру хранить ленту до ближайшей публикации."""
+    max_age = cap_by_next_publication(settings.BLOG_FEED_MAX_AGE)
+    if max_age:
+        patch_cache_control(response, max_age=max_age)
+
+
+def patch_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Cookie',))
+
+
+def feed_last_modified(versions):
+    """Last-Modified страницы: последнее изменение её областей.
+
+    Отложенная публикация появляется без записи в базу, поэтому в
+    значение входит и дата ближайшей публикации: с её наступлением
+    Last-Modified сдвигается, и If-Modified-Since не даёт ложный 304.
+    """
+    last_modified = max(versions) // 10 ** 9
+    next_pub_date = next_publication()
+    if next_pub_date is not None:
+        last_modified = max(last_modified, int(next_pub_date.timestamp()))
+    return last_modified
+
+
+def page_digest(request, versions):
+    """Ключ страницы: адрес, пользователь и версии её областей."""
+    # Страница зависит и от пользователя (шапка, черновики автора),
+    # а для вошедшего — и от CSRF-токена формы комментария: после
+    # нового входа токен другой, и старая страница не годится
+    csrf_secret = ''
+    if request.user.is_authenticated:
+        # get_token заводит токен, если его ещё нет: тогда ETag
+        # первого ответа совпадёт с токеном в его cookie
+        get_token(request)
+        csrf_secret = request.META['CSRF_COOKIE']
+    raw_key = '|'.join(
+        [request.get_full_path(), request.user.get_username(),
+         csrf_secret, str(next_publication())]
+        + [str(v) for v in versions]
+    )
+    return hashlib.md5(raw_key.encode()).hexdigest()
+
+
+def cache_feed(*scope_templates, lookup=None):
+    """Отвечать 304 по ETag/Last-Modified и кэшировать анонимные страницы.
+
+    Шаблоны областей форматируются аргументами view, например
+    ``@cache_feed(INDEX_SCOPE)`` или ``@cache_feed('author:{username}')``.
+    ``lookup(request, **kwargs)`` находит объект страницы или бросает
+    Http404 — до проверки валидаторов, чтобы 304 не получали
+    несуществующие и скрытые страницы; найденный объект передаётся
+    view аргументом ``obj``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if lookup is not None:
+                kwargs['obj'] = lookup(request, *args, **kwargs)
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = [GLOBAL_SCOPE] + [
+                template.format(**kwargs) for template in scope_templates
+            ]
+            versions = get_versions(scopes)
+            anonymous = not request.user.is_authenticated
+            digest = page_digest(request, versions)
+            etag = quote_etag(digest)
+            # Точности в секунду хватает лишь для общих анонимных
+            # страниц; страницы вошедших проверяются только по ETag
+            last_modified = (
+                feed_last_modified(versions) if anonymous else None
+            )
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+
+            timeout = settings.BLOG_FEED_CACHE_TIMEOUT
+            use_page_cache = anonymous and timeout
+            key = PAGE_KEY.format(digest)
+            response = cache.get(key) if use_page_cache else None
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if use_page_cache and response.status_code == 200:
+                    cache.set(key, response, page_timeout())
+            if response.status_code == 200:
+                patch_validators(response, etag, last_modified)
+                if anonymous:
+                    patch_feed_max_age(response)
+            return response
+        return wrapper
+    return decorator
+
+
+def card_scopes(post):
+    """Области, от которых зависит карточка публикации в ленте.
+
+    Категория и местоположение меняют общую область ``global``.
+    """
+    return [
+        GLOBAL_SCOPE, post_scope(post.pk), author_scope(post.author.username)
+    ]
+
+
+def cached_fragments(posts, render):
+    """Отрисовать публикации функцией ``render`` с кэшем по версиям.
+
+    Версии и готовые фрагменты всей страницы читаются двумя обращениями
+    к кэшу; возвращает словарь {id публикации: HTML}.
+    """
+    post_scopes = {post.pk: card_scopes(post) for post in posts}
+    scopes = sorted({
+        scope for scopes in post_scopes.values() for scope in scopes
+    })
+    versions = dict(zip(scopes, get_versions(scopes)))
+    keys = {}
+    for pk, scopes in post_scopes.items():
+        raw_key = '|'.join(str(versions[scope]) for scope in scopes)
+        keys[pk] = CARD_KEY.format(
+            pk, hashlib.md5(raw_key.encode()).hexdigest()
+        )
+    cached = cache.get_many(keys.values())
+    fragments = {}
+    missing = {}
+    for post in posts:
+        key = keys[post.pk]
+        if key in cached:
+            fragments[post.pk] = cached[key]
+        else:
+            fragments[post.pk] = missing[key] = render(post)
+    if missing:
+        cache.set_many(missing, settings.BLOG_CARD_CACHE_TIMEOUT)
+    return fragments
+
+
+def count_keys(scopes):
+    # Публикация категорий и мест меняет версию global, а вместе
+    # с ней и ключи всех счётчиков
+    global_version, = get_versions([GLOBAL_SCOPE])
+    return [COUNT_KEY.format(scope, global_version) for scope in scopes]
+
+
+def feed_count(scope, queryset):
+    """Число публикаций ленты: оценка из кэша или точный COUNT(*)."""
+    key, = count_keys([scope])
+    count = cache.get(key)
+    if count is None or count < settings.BLOG_EXACT_COUNT_THRESHOLD:
+        count = queryset.count()
+        # Отложенная публикация появится в ленте без сигналов
+        cache.set(key, count, cap_by_next_publication(
+            settings.BLOG_FEED_COUNT_TIMEOUT
+        ))
+    return count
+
+
+def adjust_feed_counts(scopes, delta):
+    for key in count_keys(scopes):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Счётчика нет — он будет посчитан при следующем запросе
+            pass
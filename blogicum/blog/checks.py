@@ -0,0 +1,40 @@
+"""Проверки настроек, от которых зависит сброс кэша лент."""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+from .state import STATE_CACHE_ALIAS
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if STATE_CACHE_ALIAS not in settings.CACHES:
+        return [Error(
+            f'Не настроен кэш {STATE_CACHE_ALIAS!r}.',
+            hint=(
+                'В нём хранятся версии кэша лент и даты публикаций '
+                '(blog.state): нужен общий для процессов кэш без '
+                'вытеснения записей.'
+            ),
+            id='blog.E001',
+        )]
+    errors = []
+    for alias in ('default', STATE_CACHE_ALIAS):
+        backend = settings.CACHES[alias].get('BACKEND')
+        if backend not in PROCESS_LOCAL_CACHES:
+            continue
+        errors.append(Warning(
+            f'Кэш {alias!r} ({backend}) не общий для процессов.',
+            hint=(
+                'Версии кэша лент меняют и веб-воркеры, и фоновые команды '
+                '(run_tasks, promote_posts, import_blog): без общего кэша '
+                '(файлового, DatabaseCache, Redis) страницы и карточки '
+                'в других процессах не сбрасываются.'
+            ),
+            id='blog.W001',
+        ))
+    return errors
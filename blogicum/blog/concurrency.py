@@ -0,0 +1,103 @@
+"""Асинхронные view поверх синхронного ORM.
+
+В Django 3.2 нет асинхронного ORM, кэша и шаблонов, а sync_to_async
+с ``thread_sensitive=True`` (так ASGI-обработчик вызывает обычные view)
+выполняет код всех запросов в одном общем потоке: под ASGI запросы
+встают в очередь друг за другом.
+
+Декоратор async_view добавляет view асинхронный вариант
+``view.as_async``: весь её синхронный код (запросы к базе, кэш, шаблон)
+выполняется за один переход в поток. Под ASGI это поток из пула, со
+своим соединением с базой, поэтому запросы обрабатываются параллельно.
+
+Под WSGI асинхронная view только мешает: Django запускает её через
+async_to_sync, и каждый запрос платит за цикл событий и переходы между
+потоками. Поэтому маршруты (blog.urls) берут асинхронный вариант через
+route_view, лишь когда включена настройка ``BLOG_ASYNC_VIEWS`` — её
+включает blogicum.asgi.
+"""
+import asyncio
+import importlib
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connections
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+
+def enable_async_mode(middleware):
+    """Пометить middleware корутиной, если дальше по цепочке async.
+
+    Тот же приём использует django.utils.deprecation.MiddlewareMixin.
+    """
+    if asyncio.iscoroutinefunction(middleware.get_response):
+        middleware._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+def count_queries(stack, stats):
+    """Подключить ``stats`` к соединениям текущего потока, если ещё нет."""
+    for connection in connections.all():
+        if stats not in connection.execute_wrappers:
+            stack.enter_context(connection.execute_wrapper(stats))
+
+
+async def run_sync(request, func, *args, **kwargs):
+    """Выполнить синхронный ``func`` для запроса ``request``."""
+    in_pool = isinstance(request, ASGIRequest)
+
+    def call():
+        with ExitStack() as stack:
+            # QueryBudgetMiddleware видит только соединения своего потока
+            stats = getattr(request, 'query_stats', None)
+            if stats is not None:
+                count_queries(stack, stats)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if in_pool:
+                    # Сигнал request_finished закроет соединения только
+                    # своего потока; за соединениями пула следим сами
+                    close_old_connections()
+
+    return await sync_to_async(call, thread_sensitive=not in_pool)()
+
+
+def async_view(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_sync(request, view, request, *args, **kwargs)
+    view.as_async = wrapper
+    return view
+
+
+def route_view(view):
+    """View для маршрута: асинхронный вариант при BLOG_ASYNC_VIEWS."""
+    if settings.BLOG_ASYNC_VIEWS:
+        return getattr(view, 'as_async', view)
+    return view
+
+
+@contextmanager
+def async_views(enabled):
+    """Пересобрать маршруты blog с асинхронными view или без них.
+
+    Для сравнения обработчиков в одном процессе (bench_handlers).
+    """
+    def reload_urls():
+        # Корневой URLconf хранит разобранный include('blog.urls')
+        from . import urls
+
+        importlib.reload(urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    try:
+        with override_settings(BLOG_ASYNC_VIEWS=enabled):
+            reload_urls()
+            yield
+    finally:
+        reload_urls()
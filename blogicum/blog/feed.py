@@ -0,0 +1,111 @@
+"""Материализованная лента: таблица FeedEntry.
+
+refresh_feed пересобирает записи для выборки публикаций — её вызывают
+сигналы при изменении публикаций и категорий. Отложенная публикация
+становится видимой без всякой записи в базу, поэтому её вносит
+promote_due_posts: при первом запросе ленты после наступления
+``pub_date`` (см. blog.publication) и командой
+``manage.py promote_posts``. Изменения категории затрагивают все её
+публикации, поэтому их обходит пачками фоновая задача
+sync_category_feed; пока она не выполнена, записи категории, снятой
+с публикации, отбрасывает visible_entries — по её флагу в базе.
+"""
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category, FeedEntry, Post
+from .state import state_cache
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# До какого момента отложенные публикации уже внесены в ленту
+PROMOTED_UNTIL_KEY = 'blog:feed:promoted_until'
+
+
+def visible_entries():
+    """Записи ленты без категорий, которые ждут sync_category_feed."""
+    # Подзапрос к таблице категорий, а не JOIN: снятых с публикации
+    # категорий единицы, и лента по-прежнему идёт по индексу pub_date
+    return FeedEntry.objects.exclude(
+        category_pk__in=Category.objects.filter(
+            is_published=False
+        ).values('pk')
+    )
+
+
+def refresh_feed(posts, batch_size=BATCH_SIZE):
+    """Пересобрать записи ленты для публикаций из выборки ``posts``."""
+    with transaction.atomic():
+        FeedEntry.objects.filter(post__in=posts.values('pk')).delete()
+        entries = []
+        visible = posts.published().for_feed().order_by()
+        for post in visible.iterator(chunk_size=batch_size):
+            entries.append(FeedEntry.from_post(post))
+            if len(entries) >= batch_size:
+                FeedEntry.objects.bulk_create(entries)
+                entries = []
+        FeedEntry.objects.bulk_create(entries)
+
+
+def post_id_batches(posts, batch_size=BATCH_SIZE):
+    """Ключи публикаций выборки пачками по возрастанию, без OFFSET."""
+    batch = []
+    while True:
+        if batch:
+            posts = posts.filter(pk__gt=batch[-1])
+        batch = list(
+            posts.order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+
+
+@task
+def sync_category_feed(category_id, batch_size=BATCH_SIZE):
+    """Привести записи ленты к текущему состоянию категории.
+
+    Каждая пачка — отдельная транзакция: снятие с публикации большой
+    категории не держит блокировку записи до конца. В конце меняется
+    версия global, и страницы со счётчиками, закэшированные по ходу
+    обновления, выбрасываются.
+    """
+    from .caching import GLOBAL_SCOPE, bump_versions
+
+    started = time.monotonic()
+    total = 0
+    posts = Post.objects.filter(category_id=category_id)
+    for batch in post_id_batches(posts, batch_size):
+        refresh_feed(Post.objects.filter(pk__in=batch), batch_size)
+        total += len(batch)
+    bump_versions([GLOBAL_SCOPE])
+    logger.info(
+        'Лента категории %s обновлена: %d публикаций за %.2f с',
+        category_id, total, time.monotonic() - started
+    )
+    return total
+
+
+def rebuild_feed():
+    refresh_feed(Post.objects.all())
+    state_cache.set(PROMOTED_UNTIL_KEY, timezone.now(), None)
+
+
+def promote_due_posts():
+    """Внести в ленту публикации, чьё время публикации уже наступило."""
+    now = timezone.now()
+    promoted_until = state_cache.get(PROMOTED_UNTIL_KEY)
+    due = Post.objects.published().filter(feed_entry__isnull=True)
+    if promoted_until is not None:
+        # Иначе (кэш очищен) — поиск по всей таблице, зато надёжный
+        due = due.filter(pub_date__gt=promoted_until)
+    due_ids = list(due.values_list('pk', flat=True))
+    if due_ids:
+        refresh_feed(Post.objects.filter(pk__in=due_ids))
+    state_cache.set(PROMOTED_UNTIL_KEY, now, None)
+    return len(due_ids)
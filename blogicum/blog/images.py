@@ -0,0 +1,126 @@
+"""Обработка изображений публикаций и их уменьшенные копии (renditions).
+
+Загруженный файл обрабатывает фоновая задача ``process_post_image``:
+проверка, поворот по EXIF, удаление EXIF и нарезка копий. Для каждой
+ширины из ``BLOG_IMAGE_RENDITION_WIDTHS``, меньшей ширины оригинала,
+рядом с ним сохраняются WebP и JPEG:
+``posts/3f/3f9a….jpg`` → ``posts/3f/3f9a….w640.webp``.
+Имена вычисляются по имени и ширине оригинала, поэтому для вывода
+``srcset`` не нужно обращаться к хранилищу. Имя оригинала — хэш его
+содержимого (blog.storage), так что уже нарезанные копии повторно
+загруженного файла годятся как есть.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .tasks import task
+
+RENDITION_FORMATS = {
+    # расширение: (формат Pillow, параметры сохранения)
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def rendition_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'{root}.w{width}.{extension}'
+
+
+def rendition_widths(original_width):
+    if not original_width:
+        return []
+    return [
+        width for width in settings.BLOG_IMAGE_RENDITION_WIDTHS
+        if width < original_width
+    ]
+
+
+def renditions(image):
+    """Пары (имя файла, ширина) копий для ImageFieldFile по расширениям."""
+    widths = rendition_widths(image.instance.image_width)
+    return {
+        extension: [
+            (rendition_name(image.name, width, extension), width)
+            for width in widths
+        ]
+        for extension in RENDITION_FORMATS
+    }
+
+
+def encode(picture, extension):
+    pillow_format, options = RENDITION_FORMATS[extension]
+    if pillow_format == 'JPEG' and picture.mode not in ('RGB', 'L'):
+        picture = picture.convert('RGB')
+    buffer = BytesIO()
+    picture.save(buffer, pillow_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def open_image(image):
+    with image.storage.open(image.name) as source:
+        picture = Image.open(source)
+        picture.load()
+    return picture
+
+
+def generate_renditions(image, original=None):
+    """Создать все копии изображения; вернуть имена сохранённых файлов."""
+    storage = image.storage
+    if original is None:
+        original = open_image(image)
+    widths = rendition_widths(image.instance.image_width)
+    saved = []
+    for width in widths:
+        missing = [
+            extension for extension in RENDITION_FORMATS
+            if not storage.exists(rendition_name(image.name, width, extension))
+        ]
+        if not missing:
+            continue
+        height = max(1, round(original.height * width / original.width))
+        picture = original.resize((width, height), Image.Resampling.LANCZOS)
+        for extension in missing:
+            name = rendition_name(image.name, width, extension)
+            saved.append(storage.save(name, encode(picture, extension)))
+    return saved
+
+
+@task
+def process_post_image(post_id):
+    """Проверить, очистить и нарезать только что загруженное изображение."""
+    from .models import Post
+
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    image = post.image
+    storage = image.storage
+    try:
+        with storage.open(image.name) as source:
+            Image.open(source).verify()
+        original = open_image(image)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        # Не изображение: публикация остаётся без картинки, а сам файл
+        # удалит collect_media, когда на него не останется ссылок
+        post.image = None
+        post.image_width = None
+        post.image_status = Post.IMAGE_FAILED
+        post.save(update_fields=['image', 'image_width', 'image_status'])
+        return
+
+    picture = ImageOps.exif_transpose(original)
+    if original.getexif():
+        # Перекодируем без EXIF (координаты, модель камеры и т. п.);
+        # у очищенного файла другое содержимое, а значит, и имя
+        buffer = BytesIO()
+        picture.save(buffer, original.format, exif=b'')
+        image.save(image.name, ContentFile(buffer.getvalue()), save=False)
+    post.image_width = picture.width
+    generate_renditions(post.image, picture)
+    post.image_status = Post.IMAGE_READY
+    post.save(update_fields=['image', 'image_width', 'image_status'])
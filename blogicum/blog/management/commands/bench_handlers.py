@@ -0,0 +1,200 @@
+import asyncio
+import io
+import json
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, override_settings
+
+from blog.concurrency import async_views
+
+from .run_bench import latency_stats, make_url, sample_parameters
+
+User = get_user_model()
+
+# Страницы чтения, у которых есть асинхронные версии (blog.concurrency)
+READ_ROUTES = (
+    ('blog:index', []),
+    ('blog:category_posts', ['category_slug']),
+    ('blog:post_detail', ['post_id']),
+    ('blog:profile', ['username']),
+)
+HOST = 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI- и ASGI-обработчиков '
+        'Django на страницах чтения при параллельных запросах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Сколько запросов отправить каждому обработчику.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Сколько запросов выполняется одновременно.'
+        )
+        parser.add_argument(
+            '--interface', choices=('wsgi', 'asgi', 'both'), default='both'
+        )
+        parser.add_argument(
+            '--username', help='От чьего имени ходить (без кэша страниц).'
+        )
+        parser.add_argument(
+            '--no-page-cache', action='store_true',
+            help='Отключить кэш страниц для анонимов: мерить сами view.'
+        )
+        parser.add_argument('--output', help='Куда записать JSON.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.cookie = self.session_cookie(options['username'])
+        samples = sample_parameters(None)
+        names = [
+            (name, parameters) for name, parameters in READ_ROUTES
+            if all(samples.get(p) for p in parameters)
+        ]
+        if not names:
+            raise CommandError('В базе нет публикаций: запустите seed_bench')
+        urls = [
+            make_url(*random.choice(names), samples)
+            for _ in range(options['requests'])
+        ]
+        interfaces = (
+            ('wsgi', 'asgi') if options['interface'] == 'both'
+            else (options['interface'],)
+        )
+        timeout = 0 if options['no_page_cache'] else (
+            settings.BLOG_FEED_CACHE_TIMEOUT
+        )
+        report = {'concurrency': options['concurrency']}
+        with override_settings(BLOG_FEED_CACHE_TIMEOUT=timeout):
+            for interface in interfaces:
+                run = getattr(self, f'run_{interface}')
+                # Асинхронные view — только под ASGI, как в blogicum.asgi
+                with async_views(interface == 'asgi'):
+                    started = time.perf_counter()
+                    results = run(urls, options['concurrency'])
+                    elapsed = time.perf_counter() - started
+                report[interface] = self.summary(results, elapsed)
+                self.stdout.write(
+                    f"{interface}: {report[interface]['rps']} запросов/с, "
+                    f"p50={report[interface]['p50_ms']} ms, "
+                    f"p99={report[interface]['p99_ms']} ms"
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def session_cookie(username):
+        if not username:
+            return ''
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден')
+        client = Client()
+        client.force_login(user)
+        name = settings.SESSION_COOKIE_NAME
+        return f'{name}={client.cookies[name].value}'
+
+    @staticmethod
+    def summary(results, elapsed):
+        return {
+            'requests': len(results),
+            'status': dict(Counter(str(status) for status, _ in results)),
+            'rps': round(len(results) / elapsed, 1),
+            **latency_stats([duration for _, duration in results]),
+        }
+
+    def run_wsgi(self, urls, concurrency):
+        """Потоки с общим WSGI-приложением, как в gunicorn --threads."""
+        application = get_wsgi_application()
+
+        def request(url):
+            path, _, query = url.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': HOST,
+                'HTTP_COOKIE': self.cookie,
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr,
+            }
+            statuses = []
+            start = time.perf_counter()
+            body = application(
+                environ, lambda status, headers: statuses.append(status)
+            )
+            try:
+                b''.join(body)
+            finally:
+                body.close()
+            duration = (time.perf_counter() - start) * 1000
+            return int(statuses[0].split()[0]), duration
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(request, urls))
+
+    def run_asgi(self, urls, concurrency):
+        """Одновременные запросы к ASGI-приложению в одном цикле событий."""
+        application = get_asgi_application()
+
+        async def request(url, semaphore):
+            parts = urlsplit(url)
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': parts.path,
+                'query_string': parts.query.encode(),
+                'headers': [
+                    (b'host', HOST.encode()),
+                    (b'cookie', self.cookie.encode()),
+                ],
+                'server': (HOST, 80),
+                'client': ('127.0.0.1', 0),
+            }
+            status = None
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+
+            async with semaphore:
+                start = time.perf_counter()
+                await application(scope, receive, send)
+                return status, (time.perf_counter() - start) * 1000
+
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(request(url, semaphore) for url in urls)
+            )
+
+        return asyncio.run(main())
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.models import MediaFile, Post
+from blog.storage import ContentAddressedStorage
+
+
+def recount_references():
+    """Пересчитать MediaFile.ref_count по таблице публикаций."""
+    counts = Post.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).order_by().values('image').annotate(total=Count('pk'))
+    with transaction.atomic():
+        MediaFile.objects.update(ref_count=0)
+        for row in counts:
+            MediaFile.objects.update_or_create(
+                name=row['image'], defaults={'ref_count': row['total']}
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы изображений, на которые не ссылается ни одна '
+        'публикация, вместе с их уменьшенными копиями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=24,
+            help=(
+                'Не трогать файлы моложе этого срока: их публикация может '
+                'быть ещё не сохранена.'
+            )
+        )
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Сначала пересчитать ссылки по таблице публикаций.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+
+    def handle(self, *args, grace_hours, recount, dry_run, **options):
+        storage = Post._meta.get_field('image').storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError(
+                'Post.image хранится не в ContentAddressedStorage.'
+            )
+        if recount:
+            recount_references()
+        referenced = set(
+            MediaFile.objects.filter(
+                ref_count__gt=0
+            ).values_list('name', flat=True)
+        )
+        cutoff = timezone.now() - timedelta(hours=grace_hours)
+        upload_to = Post._meta.get_field('image').upload_to
+        removed = freed = 0
+        for name in list(storage.originals(upload_to.rstrip('/'))):
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+            for file_name in [name] + storage.derived_names(name):
+                freed += storage.size(file_name)
+                if not dry_run:
+                    storage.delete(file_name)
+            if not dry_run:
+                MediaFile.objects.filter(name=name, ref_count=0).delete()
+            removed += 1
+            self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {removed}, освобождено байт: {freed}'
+            + (' (пробный запуск)' if dry_run else '')
+        ))
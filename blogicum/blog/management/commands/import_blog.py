@@ -0,0 +1,158 @@
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+
+from blog.caching import GLOBAL_SCOPE, bump_versions
+from blog.feed import rebuild_feed
+from blog.publication import refresh_next_publication
+
+from .collect_media import recount_references
+from .export_blog import BLOG_MODELS, get_models
+
+
+def rebuild_derived_data(stdout):
+    """Восстановить то, что при bulk_create не сделали сигналы."""
+    call_command('recount_comments', stdout=stdout)
+    call_command('rebuild_search_index', stdout=stdout)
+    rebuild_feed()
+    recount_references()
+    bump_versions([GLOBAL_SCOPE])
+    refresh_next_publication()
+
+
+@contextmanager
+def keep_timestamps(models):
+    """Не подменять created_at (auto_now_add) временем импорта."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_blog (JSON Lines) или фикстуру '
+        'loaddata (JSON) пачками через bulk_create, без сигналов '
+        'на каждую строку; счётчики, поисковый индекс и кэш '
+        'восстанавливаются в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixture', help='Файл .jsonl или .json; «-» — stdin.'
+        )
+        parser.add_argument(
+            '--models', nargs='+', default=BLOG_MODELS,
+            help='Какие модели загружать; остальные строки пропускаются.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк вставлять одним INSERT.'
+        )
+        parser.add_argument(
+            '--skip-existing', action='store_true',
+            help='Пропускать строки с уже занятым ключом (догрузка).'
+        )
+
+    def handle(self, *args, fixture, models, batch_size, skip_existing,
+               **options):
+        self.models = get_models(models)
+        self.batch_size = batch_size
+        self.skip_existing = skip_existing
+        self.pending = defaultdict(list)
+        self.m2m = []
+        self.loaded = defaultdict(int)
+        self.skipped = 0
+
+        stream = sys.stdin if fixture == '-' else open(
+            fixture, encoding='utf-8'
+        )
+        file_format = 'json' if fixture.endswith('.json') else 'jsonl'
+        try:
+            # Внешние ключи проверяются при коммите, так что порядок
+            # строк в файле не важен
+            with transaction.atomic(), keep_timestamps(self.models):
+                self.load(serializers.deserialize(
+                    file_format, stream, ignorenonexistent=True
+                ))
+        except IntegrityError as error:
+            raise CommandError(
+                f'Строки противоречат данным в базе: {error}. '
+                'Для догрузки используйте --skip-existing.'
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.reset_sequences()
+        rebuild_derived_data(self.stdout)
+        for model, count in self.loaded.items():
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {sum(self.loaded.values())}, '
+            f'пропущено: {self.skipped}'
+        ))
+
+    def load(self, records):
+        for record in records:
+            model = type(record.object)
+            if model not in self.models:
+                self.skipped += 1
+                continue
+            self.pending[model].append(record.object)
+            if record.m2m_data:
+                self.m2m.append(record)
+            if len(self.pending[model]) >= self.batch_size:
+                self.flush(model)
+        for model in list(self.pending):
+            self.flush(model)
+        self.load_m2m()
+
+    def flush(self, model):
+        objects = self.pending.pop(model, [])
+        if objects:
+            model._default_manager.bulk_create(
+                objects, batch_size=self.batch_size,
+                ignore_conflicts=self.skip_existing,
+            )
+            self.loaded[model] += len(objects)
+
+    def load_m2m(self):
+        """Связи «многие ко многим» (группы и права пользователей)."""
+        rows = defaultdict(list)
+        for record in self.m2m:
+            for name, values in record.m2m_data.items():
+                field = record.object._meta.get_field(name)
+                through = field.remote_field.through
+                rows[through].extend(
+                    through(**{
+                        f'{field.m2m_field_name()}_id': record.object.pk,
+                        f'{field.m2m_reverse_field_name()}_id': value,
+                    })
+                    for value in values
+                )
+        for through, objects in rows.items():
+            through._default_manager.bulk_create(
+                objects, batch_size=self.batch_size, ignore_conflicts=True
+            )
+
+    def reset_sequences(self):
+        # Ключи пришли из файла: последовательности (PostgreSQL) должны
+        # продолжиться после них
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), self.models):
+                cursor.execute(sql)
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.feed import promote_due_posts, rebuild_feed
+from blog.publication import refresh_next_publication
+
+
+class Command(BaseCommand):
+    help = (
+        'Вносит в материализованную ленту отложенные публикации, '
+        'время которых наступило.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересобрать ленту целиком по таблице публикаций.'
+        )
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Не завершаться: ждать следующую отложенную публикацию.'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help='Наибольшая пауза в секундах в режиме --watch.'
+        )
+
+    def handle(self, *args, rebuild, watch, max_sleep, **options):
+        if rebuild:
+            rebuild_feed()
+            self.stdout.write(self.style.SUCCESS('Лента пересобрана'))
+        while True:
+            promoted = promote_due_posts()
+            if promoted:
+                self.stdout.write(f'Добавлено в ленту: {promoted}')
+            next_pub_date = refresh_next_publication()
+            if not watch:
+                break
+            # Публикацию могут запланировать и на более ранний срок —
+            # поэтому не спим дольше max_sleep
+            pause = max_sleep
+            if next_pub_date is not None:
+                until = (next_pub_date - timezone.now()).total_seconds()
+                pause = min(max(until, 0), max_sleep)
+            time.sleep(pause)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт полнотекстовый индекс публикаций.'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('pk', 'title', 'text').iterator()
+        with transaction.atomic():
+            get_search_backend().rebuild(posts)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересоздан'))
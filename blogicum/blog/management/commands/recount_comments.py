@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+
+from blog.models import FeedEntry, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает Post.comment_count и FeedEntry.comment_count '
+        'по таблице комментариев.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Сколько публикаций обновлять в одной транзакции.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        updated = 0
+        for start in range(0, last_pk, batch_size):
+            with transaction.atomic():
+                updated += Post.objects.filter(
+                    pk__gt=start, pk__lte=start + batch_size
+                ).recount_comments()
+                FeedEntry.objects.filter(
+                    pk__gt=start, pk__lte=start + batch_size
+                ).update(comment_count=Subquery(
+                    Post.objects.filter(pk=OuterRef('pk')).values(
+                        'comment_count'
+                    )
+                ))
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано публикаций: {updated}')
+        )
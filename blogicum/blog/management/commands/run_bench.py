@@ -0,0 +1,241 @@
+import json
+import math
+import random
+import time
+from collections import Counter
+from importlib import import_module
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.urls import reverse
+
+from blog.middleware import QueryStats
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+URL_MODULES = ('blog.urls', 'users.urls', 'pages.urls')
+SEARCH_QUERIES = ('город', 'море книга', 'путеш', 'кофе утро')
+# Сколько разных значений параметров URL подбирать заранее
+SAMPLE_SIZE = 20
+PERCENTILES = (50, 95, 99)
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'rps')
+# Страницы, которые открываются только для своих публикаций и профиля
+OWNER_ROUTES = ('blog:edit_post', 'blog:delete_post', 'users:edit_profile')
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+def latency_stats(durations):
+    """Среднее и перцентили задержек в миллисекундах."""
+    durations = sorted(durations)
+    stats = {'mean_ms': round(sum(durations) / len(durations), 3)}
+    for percent in PERCENTILES:
+        stats[f'p{percent}_ms'] = round(percentile(durations, percent), 3)
+    return stats
+
+
+def url_patterns():
+    """Пары (имя маршрута, имена параметров) из URL_MODULES."""
+    for module_name in URL_MODULES:
+        module = import_module(module_name)
+        for pattern in module.urlpatterns:
+            yield (
+                f'{module.app_name}:{pattern.name}',
+                sorted(pattern.pattern.converters),
+            )
+
+
+def sample_parameters(user):
+    """Заранее подобрать существующие значения параметров URL."""
+    last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+    posts = {}
+    for _ in range(SAMPLE_SIZE):
+        # Случайная точка и ближайшая видимая публикация после неё:
+        # без ORDER BY RANDOM() по всей таблице
+        post = Post.objects.published().filter(
+            pk__gte=random.randint(1, max(last_pk, 1))
+        ).order_by('pk').select_related('author').first()
+        if post is not None:
+            posts[post.pk] = post
+    comments = list(
+        Comment.objects.filter(author=user).values_list(
+            'post_id', 'pk'
+        )[:SAMPLE_SIZE]
+    ) if user else []
+    own_posts = list(
+        Post.objects.filter(author=user).values_list(
+            'pk', flat=True
+        )[:SAMPLE_SIZE]
+    ) if user else []
+    return {
+        'own': {
+            'post_id': own_posts,
+            'username': [user.get_username()] if user else [],
+        },
+        'post_id': list(posts),
+        'id': list(posts),
+        'username': [post.author.username for post in posts.values()],
+        'category_slug': list(
+            Category.objects.filter(is_published=True).values_list(
+                'slug', flat=True
+            )[:SAMPLE_SIZE]
+        ),
+        'comment_id': comments,
+    }
+
+
+def route_samples(name, samples):
+    return samples['own'] if name in OWNER_ROUTES else samples
+
+
+def make_url(name, parameters, samples):
+    """Случайный URL маршрута ``name`` со значениями из ``samples``."""
+    samples = route_samples(name, samples)
+    kwargs = {}
+    for parameter in parameters:
+        if parameter == 'comment_id':
+            # Комментарий и его публикация должны быть согласованы
+            kwargs['post_id'], kwargs['comment_id'] = random.choice(
+                samples['comment_id']
+            )
+        elif parameter not in kwargs:
+            kwargs[parameter] = random.choice(samples[parameter])
+    url = reverse(name, kwargs=kwargs)
+    if name == 'blog:search':
+        url += f'?q={random.choice(SEARCH_QUERIES)}'
+    return url
+
+
+class Command(BaseCommand):
+    help = (
+        'Обходит все страницы blog, users и pages тестовым клиентом '
+        'и сохраняет задержки (p50/p95/p99), число запросов к базе '
+        'и пропускную способность в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько замеряемых запросов на каждый маршрут.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Сколько запросов сделать до замеров (прогрев кэшей).'
+        )
+        parser.add_argument(
+            '--username',
+            help='От чьего имени ходить; по умолчанию — автор последней '
+                 'публикации.'
+        )
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Ходить без входа на сайт.'
+        )
+        parser.add_argument(
+            '--output', help='Куда записать результаты в JSON.'
+        )
+        parser.add_argument(
+            '--compare', help='JSON прошлого замера для сравнения.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        # Ошибка страницы — это код 500 в отчёте, а не конец замера
+        client = Client(raise_request_exception=False)
+        user = self.bench_user(options)
+        if user is not None:
+            client.force_login(user)
+        samples = sample_parameters(user)
+
+        results = {}
+        for name, parameters in url_patterns():
+            available = route_samples(name, samples)
+            if not all(available.get(p) for p in parameters):
+                self.stderr.write(f'{name}: нет данных для {parameters}')
+                continue
+            for _ in range(options['warmup']):
+                client.get(make_url(name, parameters, samples))
+            results[name] = self.measure(
+                client, name, parameters, samples, options['requests']
+            )
+            self.stdout.write(
+                f"{name:28} p50={results[name]['p50_ms']:8.2f} ms  "
+                f"p95={results[name]['p95_ms']:8.2f} ms  "
+                f"запросов к БД={results[name]['queries']:.1f}"
+            )
+
+        report = {
+            'meta': {
+                'vendor': connection.vendor,
+                'posts': Post.objects.count(),
+                'user': user.get_username() if user else None,
+                'requests': options['requests'],
+            },
+            'urls': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    @staticmethod
+    def bench_user(options):
+        if options['anonymous']:
+            return None
+        if options['username']:
+            try:
+                return User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f"Пользователь {options['username']} не найден"
+                )
+        post = Post.objects.select_related('author').order_by('-pk').first()
+        return post.author if post else None
+
+    def measure(self, client, name, parameters, samples, total):
+        durations = []
+        statuses = Counter()
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            started = time.perf_counter()
+            for _ in range(total):
+                url = make_url(name, parameters, samples)
+                start = time.perf_counter()
+                response = client.get(url)
+                durations.append((time.perf_counter() - start) * 1000)
+                statuses[str(response.status_code)] += 1
+            elapsed = time.perf_counter() - started
+        return {
+            'example': url,
+            'requests': total,
+            'status': dict(statuses),
+            'queries': round(stats.count / total, 2),
+            'rps': round(total / elapsed, 1),
+            **latency_stats(durations),
+        }
+
+    def compare(self, baseline_path, results):
+        with open(baseline_path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['urls']
+        self.stdout.write(f'Сравнение с {baseline_path}:')
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            changes = []
+            for metric in COMPARED_METRICS:
+                before, after = baseline[name][metric], result[metric]
+                if before:
+                    changes.append(
+                        f'{metric} {(after - before) / before:+.0%}'
+                    )
+            self.stdout.write(f"{name:28} {'  '.join(changes)}")
@@ -0,0 +1,53 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.models import Task
+from blog.tasks import claim_tasks, run_task
+
+
+def close_connections():
+    # Дочерний процесс не должен использовать соединения родителя
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди blog.Task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Число процессов-исполнителей.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Сколько задач забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться.'
+        )
+
+    def handle(self, *args, processes, batch_size, poll_interval, once,
+               **options):
+        close_connections()
+        with Pool(processes, initializer=close_connections) as pool:
+            while True:
+                task_ids = claim_tasks(batch_size)
+                if not task_ids:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                statuses = pool.map(run_task, task_ids)
+                self.stdout.write(
+                    f'Выполнено задач: {len(task_ids)}, '
+                    f'с ошибкой: {statuses.count(Task.FAILED)}'
+                )
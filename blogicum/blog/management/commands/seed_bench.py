@@ -0,0 +1,139 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+from .import_blog import rebuild_derived_data
+
+User = get_user_model()
+
+WORDS = (
+    'город утро дорога море книга лето друг работа вечер осень поезд '
+    'музыка кофе горы река солнце дождь проект идея история фото '
+    'путешествие зима дом сад кино ужин рецепт прогулка парк мост '
+    'выставка концерт неделя праздник снег лес озеро остров небо'
+).split()
+
+# Доли публикаций: снятых с публикации и отложенных
+UNPUBLISHED_SHARE = 0.05
+FUTURE_SHARE = 0.02
+UNPUBLISHED_CATEGORY_SHARE = 0.1
+# Чем больше, тем сильнее «длинный хвост»: немногие авторы пишут
+# большую часть публикаций, немногие публикации собирают
+# большую часть комментариев
+SKEW = 3
+
+
+def skewed_index(size):
+    """Случайный индекс в [0, size), сильно смещённый к началу."""
+    return int(size * random.random() ** SKEW)
+
+
+def sentence(min_words, max_words):
+    words = random.choices(WORDS, k=random.randint(min_words, max_words))
+    return ' '.join(words).capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, публикациями '
+        'и комментариями для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=3000000)
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--locations', type=int, default=200)
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько строк вставлять одним INSERT.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора: одинаковые данные.'
+        )
+        parser.add_argument(
+            '--prefix', default='bench',
+            help='Префикс имён пользователей и идентификаторов категорий.'
+        )
+
+    def handle(self, *args, seed, batch_size, prefix, **options):
+        random.seed(seed)
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        password = make_password(None)
+
+        users = self.create(User, options['users'], lambda i: User(
+            username=f'{prefix}_user_{i}', password=password,
+            date_joined=self.now - timedelta(days=random.randint(0, 1000)),
+        ))
+        categories = self.create(Category, options['categories'], lambda i: (
+            Category(
+                title=sentence(1, 3), description=sentence(5, 20),
+                slug=f'{prefix}-{i}',
+                is_published=random.random() > UNPUBLISHED_CATEGORY_SHARE,
+            )
+        ))
+        locations = self.create(Location, options['locations'], lambda i: (
+            Location(name=sentence(1, 2))
+        ))
+        posts = self.create(Post, options['posts'], lambda i: Post(
+            title=sentence(2, 8),
+            text='\n\n'.join(
+                sentence(8, 30) for _ in range(random.randint(1, 8))
+            ),
+            pub_date=self.pub_date(),
+            is_published=random.random() > UNPUBLISHED_SHARE,
+            author_id=users[skewed_index(len(users))],
+            category_id=random.choice(categories),
+            location_id=(
+                random.choice(locations) if random.random() < 0.7 else None
+            ),
+        ))
+        self.create(Comment, options['comments'], lambda i: Comment(
+            post_id=posts[skewed_index(len(posts))],
+            author_id=users[skewed_index(len(users))],
+            text=sentence(3, 40),
+        ))
+
+        # bulk_create не вызывает сигналы: чиним производные данные
+        rebuild_derived_data(self.stdout)
+
+    def pub_date(self):
+        minutes = timedelta(minutes=1)
+        if random.random() < FUTURE_SHARE:
+            # Отложенные публикации — на месяц вперёд
+            return self.now + minutes * random.randint(1, 60 * 24 * 30)
+        return self.now - minutes * random.randint(0, 60 * 24 * 730)
+
+    def create(self, model, total, make):
+        """Вставить ``total`` объектов пачками; вернуть диапазон их id.
+
+        Ключи назначаются явно: SQLite не возвращает id из bulk_create.
+        """
+        first = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        for start in range(0, total, self.batch_size):
+            objects = []
+            for i in range(start, min(total, start + self.batch_size)):
+                obj = make(i)
+                obj.pk = first + i
+                objects.append(obj)
+            with transaction.atomic():
+                model.objects.bulk_create(objects)
+        # Последовательности (PostgreSQL) должны продолжиться после
+        # явно заданных ключей
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {total}')
+        return range(first, first + total)
@@ -0,0 +1,132 @@
+"""Учёт SQL-запросов каждого HTTP-запроса.
+
+QueryBudgetMiddleware через ``connection.execute_wrapper`` (работает и
+без DEBUG) считает запросы ко всем базам, их суммарное время и
+повторы одного и того же SQL (признак N+1). Итог уходит в заголовок
+``Server-Timing`` и одной JSON-строкой в лог ``blog.queries``.
+
+Бюджеты задаются настройкой ``BLOG_QUERY_BUDGETS``: имя маршрута →
+наибольшее число запросов. Превышение пишется в лог как предупреждение,
+а при ``BLOG_QUERY_BUDGET_STRICT = True`` (в тестах) — поднимает
+QueryBudgetExceeded.
+
+Под ASGI middleware работает асинхронно; запросы асинхронных view
+(blog.concurrency) считаются через ``request.query_stats`` в том
+потоке, где они выполняются.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+
+from .concurrency import count_queries, enable_async_mode
+
+logger = logging.getLogger('blog.queries')
+
+# Списки параметров разной длины — это один и тот же запрос
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+SPACES_RE = re.compile(r'\s+')
+# Сколько символов SQL повторяющегося запроса показывать в логе
+SQL_SAMPLE_LENGTH = 200
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    normalized = IN_LIST_RE.sub('(%s)', SPACES_RE.sub(' ', sql.strip()))
+    return hashlib.md5(normalized.encode()).hexdigest()[:8]
+
+
+class QueryStats:
+    """Обёртка execute_wrapper, собирающая статистику запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            self.samples.setdefault(key, sql[:SQL_SAMPLE_LENGTH])
+
+    def duplicates(self):
+        return {
+            key: {'count': count, 'sql': self.samples[key]}
+            for key, count in self.fingerprints.items() if count > 1
+        }
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        enable_async_mode(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request.query_stats = stats = QueryStats()
+        with ExitStack() as stack:
+            count_queries(stack, stats)
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        request.query_stats = stats = QueryStats()
+        response = await self.get_response(request)
+        return self.report(request, response, stats)
+
+    def report(self, request, response, stats):
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        duration_ms = stats.duration * 1000
+        timing = (
+            f'db;dur={duration_ms:.1f};desc="{stats.count} queries"'
+        )
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+
+        duplicates = stats.duplicates()
+        logger.info(json.dumps({
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(duration_ms, 1),
+            'duplicates': duplicates,
+        }, ensure_ascii=False))
+        self.check_budget(view_name, stats.count, duplicates)
+        return response
+
+    @staticmethod
+    def check_budget(view_name, count, duplicates):
+        budget = settings.BLOG_QUERY_BUDGETS.get(view_name)
+        if budget is None or count <= budget:
+            return
+        message = (
+            f'{view_name}: {count} SQL-запросов при бюджете {budget}; '
+            f'повторы: {json.dumps(duplicates, ensure_ascii=False)}'
+        )
+        if settings.BLOG_QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,38 @@
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def fill_image_width(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    images = Post.objects.exclude(image='').exclude(
+        image__isnull=True).values_list('pk', 'image')
+    for pk, name in images.iterator():
+        try:
+            with default_storage.open(name) as image_file:
+                width, _ = get_image_dimensions(image_file)
+        except OSError:
+            # Файл оригинала потерян — оставляем ширину пустой
+            continue
+        Post.objects.filter(pk=pk).update(image_width=width)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.IntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/%Y/%m/%d/', verbose_name='Изображение', width_field='image_width'),
+        ),
+        migrations.RunPython(fill_image_width, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:17
+
+import blog.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_media_files(apps, schema_editor):
+    # Уже загруженные файлы остаются под старыми именами; учитываем
+    # ссылки и на них, чтобы счётчики сходились
+    Post = apps.get_model('blog', 'Post')
+    MediaFile = apps.get_model('blog', 'MediaFile')
+    counts = Post.objects.exclude(image='').exclude(
+        image__isnull=True).values('image').annotate(total=Count('pk'))
+    MediaFile.objects.bulk_create(
+        MediaFile(name=row['image'], ref_count=row['total'])
+        for row in counts.order_by()
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_background_tasks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+            ],
+            options={
+                'verbose_name': 'файл изображения',
+                'verbose_name_plural': 'Файлы изображений',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=blog.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Изображение', width_field='image_width'),
+        ),
+        migrations.RunPython(fill_media_files, migrations.RunPython.noop),
+    ]
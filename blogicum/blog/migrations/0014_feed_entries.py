@@ -0,0 +1,85 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:44
+
+import blog.storage
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+# Как blog.models.FEED_TEXT_PREVIEW_LENGTH на момент миграции
+TEXT_PREVIEW_LENGTH = 500
+
+
+def fill_feed_entries(apps, schema_editor):
+    # Те же условия, что в PostQuerySet.published()
+    Post = apps.get_model('blog', 'Post')
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    visible = Post.objects.filter(
+        is_published=True,
+        pub_date__lte=timezone.now(),
+        category__is_published=True,
+    ).select_related('author', 'category', 'location')
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                post_id=post.pk,
+                pub_date=post.pub_date,
+                title=post.title,
+                text_preview=post.text[:TEXT_PREVIEW_LENGTH],
+                image=post.image.name or None,
+                image_width=post.image_width,
+                image_status=post.image_status,
+                author_username=post.author.username,
+                category_slug=post.category.slug,
+                category_title=post.category.title,
+                location_name=(
+                    post.location.name
+                    if post.location and post.location.is_published
+                    else None
+                ),
+                comment_count=post.comment_count,
+            )
+            for post in visible.iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('text_preview', models.TextField(verbose_name='Начало текста')),
+                ('image', models.ImageField(blank=True, null=True, storage=blog.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Изображение', width_field='image_width')),
+                ('image_width', models.IntegerField(blank=True, null=True, verbose_name='Ширина изображения')),
+                ('image_status', models.CharField(default='ready', max_length=16, verbose_name='Состояние изображения')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Автор')),
+                ('category_slug', models.SlugField(verbose_name='Категория')),
+                ('category_title', models.CharField(max_length=256, verbose_name='Название категории')),
+                ('location_name', models.CharField(blank=True, max_length=256, null=True, verbose_name='Местоположение')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Число комментариев')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['pub_date'], name='feed_entry_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['category_slug', 'pub_date'], name='feed_entry_category_idx'),
+        ),
+        migrations.RunPython(fill_feed_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+# Записи ленты есть только у публикаций с категорией
+FILL_CATEGORY_PK = '''
+UPDATE blog_feedentry SET category_pk = (
+    SELECT category_id FROM blog_post
+    WHERE blog_post.id = blog_feedentry.post_id
+)
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_task_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='category_pk',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Ключ категории'
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(FILL_CATEGORY_PK, migrations.RunSQL.noop),
+    ]
@@ -1,8 +1,37 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
+# Карточке в ленте нужен лишь начальный фрагмент текста
+# (truncatewords:10), полный текст из базы не читаем
+FEED_TEXT_PREVIEW_LENGTH = 500
+
+# Ключи публикаций, которые сейчас удаляются вместе с комментариями
+# (см. decrement_comment_count в blog.signals)
+deleting_posts = ContextVar('deleting_posts', default=frozenset())
+
+
+@contextmanager
+def posts_deletion(post_ids):
+    token = deleting_posts.set(deleting_posts.get() | set(post_ids))
+    try:
+        yield
+    finally:
+        # И после ошибки или отката: иначе поток так и пропускал бы
+        # обновление счётчиков этих публикаций
+        deleting_posts.reset(token)
+
 
 class Category(models.Model):
     title = models.CharField(
@@ -53,7 +82,54 @@ class Location(models.Model):
         return self.name
 
 
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        """Посты, видимые всем: опубликованы, в опубликованной категории."""
+        return self.filter(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True,
+        )
+
+    def for_feed(self):
+        """Выборка для карточек ленты (includes/post_card.html).
+
+        Автор, категория и местоположение подтягиваются одним JOIN,
+        а вместо полного текста читается только его начало.
+        """
+        return self.select_related(
+            'author', 'category', 'location'
+        ).defer('text').annotate(
+            text_preview=Substr('text', 1, FEED_TEXT_PREVIEW_LENGTH)
+        ).order_by('-pub_date')
+
+    def delete(self):
+        with posts_deletion(self.values_list('pk', flat=True)):
+            return super().delete()
+
+    def recount_comments(self):
+        """Пересчитать comment_count одним UPDATE по подзапросу."""
+        counts = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(Subquery(counts), 0)
+        )
+
+
 class Post(models.Model):
+    IMAGE_READY = 'ready'
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_READY, 'Готово'),
+        (IMAGE_PROCESSING, 'Обрабатывается'),
+        (IMAGE_FAILED, 'Не удалось обработать'),
+    )
+
     title = models.CharField(
         'Заголовок', max_length=256
     )
@@ -88,19 +164,74 @@ class Post(models.Model):
     )
     image = models.ImageField(
         'Изображение',
-        upload_to='posts/%Y/%m/%d/',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
         null=True,
-        blank=True
+        blank=True,
     )
+    # Ширина оригинала: по ней выбираются уменьшенные копии (blog.images).
+    # Не width_field: тот при пустой ширине открывал бы файл при каждом
+    # создании экземпляра; заполняется при загрузке (blog.signals)
+    # и фоновой задачей process_post_image
+    image_width = models.IntegerField(
+        'Ширина изображения', null=True, blank=True, editable=False
+    )
+    # Пока загруженное изображение обрабатывает фоновая задача,
+    # вместо него показывается заглушка
+    image_status = models.CharField(
+        'Состояние изображения', max_length=16,
+        choices=IMAGE_STATUS_CHOICES, default=IMAGE_READY, editable=False
+    )
+    # Счётчик хранится в самой публикации, чтобы ленты не делали
+    # GROUP BY по комментариям; поддерживается сигналами (blog.signals)
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев', default=0, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ['-pub_date']  # по умолчанию — от новых к старым
+        # Индексы под выборки лент: SQLite идёт по pub_date в нужном
+        # порядке без временной сортировки; частичный индекс покрывает
+        # ровно опубликованные посты главной ленты
+        indexes = [
+            models.Index(
+                fields=['pub_date'],
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx'),
+            models.Index(
+                fields=['category', 'pub_date'],
+                name='post_category_feed_idx'),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_feed_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Не перезаписываем счётчик значением из устаревшего экземпляра:
+        # его меняют только атомарные F()-обновления.
+        if (self.pk is not None and not self._state.adding
+                and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != 'comment_count'
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with posts_deletion([self.pk]):
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -118,6 +249,175 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['post', 'created_at'],
+                name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author} on {self.post}'
+
+
+class Task(models.Model):
+    """Фоновая задача в очереди на базе БД (см. blog.tasks)."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    kwargs = models.JSONField('Аргументы', default=dict)
+    status = models.CharField(
+        'Состояние', max_length=16,
+        choices=STATUS_CHOICES, default=PENDING
+    )
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='task_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+
+class MediaFile(models.Model):
+    """Файл изображения и число публикаций, которые на него ссылаются.
+
+    Одинаковые загрузки хранятся одним файлом (blog.storage), поэтому
+    удалять его можно, только когда ссылок не осталось.
+    """
+
+    name = models.CharField('Файл', max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField('Число ссылок', default=0)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
+
+
+class FeedEntry(models.Model):
+    """Видимая публикация в ленте со всем, что нужно её карточке.
+
+    Таблица содержит ровно публикации, которые сейчас видны всем
+    (PostQuerySet.published), поэтому главная лента и лента категории —
+    один проход по индексу без JOIN и без условий видимости. Записи
+    поддерживают сигналы (blog.signals), отложенные публикации
+    добавляются, когда наступает их время (blog.feed).
+    """
+
+    IMAGE_PROCESSING = Post.IMAGE_PROCESSING
+    # Невидимые публикации в ленту не попадают
+    is_published = True
+
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True,
+        related_name='feed_entry', verbose_name='Публикация'
+    )
+    pub_date = models.DateTimeField('Дата и время публикации')
+    title = models.CharField('Заголовок', max_length=256)
+    text_preview = models.TextField('Начало текста')
+    image = models.ImageField(
+        'Изображение', upload_to='posts/',
+        storage=ContentAddressedStorage(), null=True, blank=True
+    )
+    image_width = models.IntegerField(
+        'Ширина изображения', null=True, blank=True
+    )
+    image_status = models.CharField(
+        'Состояние изображения', max_length=16,
+        default=Post.IMAGE_READY
+    )
+    author_username = models.CharField('Автор', max_length=150)
+    # Ключ, а не связь: по нему blog.feed.visible_entries отбрасывает
+    # записи категорий, снятых с публикации, пока их не удалит задача
+    category_pk = models.PositiveIntegerField('Ключ категории')
+    category_slug = models.SlugField('Категория')
+    category_title = models.CharField('Название категории', max_length=256)
+    # Пусто, если места нет или оно снято с публикации
+    location_name = models.CharField(
+        'Местоположение', max_length=256, null=True, blank=True
+    )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев', default=0
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['pub_date'], name='feed_entry_pub_date_idx'),
+            models.Index(
+                fields=['category_slug', 'pub_date'],
+                name='feed_entry_category_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def from_post(cls, post):
+        """Запись для публикации из выборки PostQuerySet.for_feed()."""
+        location = post.location
+        return cls(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            title=post.title,
+            text_preview=post.text_preview,
+            image=post.image.name or None,
+            image_width=post.image_width,
+            image_status=post.image_status,
+            author_username=post.author.username,
+            category_pk=post.category_id,
+            category_slug=post.category.slug,
+            category_title=post.category.title,
+            location_name=(
+                location.name if location and location.is_published
+                else None
+            ),
+            comment_count=post.comment_count,
+        )
+
+    # Шаблон карточки (includes/post_card.html) написан для Post:
+    # те же атрибуты из денормализованных полей
+
+    @property
+    def id(self):
+        return self.post_id
+
+    @cached_property
+    def author(self):
+        return SimpleNamespace(username=self.author_username)
+
+    @cached_property
+    def category(self):
+        return SimpleNamespace(
+            slug=self.category_slug, title=self.category_title,
+            is_published=True,
+        )
+
+    @cached_property
+    def location(self):
+        if self.location_name is None:
+            return None
+        return SimpleNamespace(name=self.location_name, is_published=True)
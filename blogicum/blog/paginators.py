@@ -0,0 +1,198 @@
+import base64
+import binascii
+import collections.abc
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .caching import feed_count
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+
+# Ссылки на страницы: по столько вокруг текущей и у каждого края
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+class FeedPage(Page):
+
+    @property
+    def elided_page_range(self):
+        """Номера страниц вокруг текущей и у краёв, пропуски — «…»."""
+        return self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=PAGES_ON_EACH_SIDE,
+            on_ends=PAGES_ON_ENDS,
+        )
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор по номеру страницы с окном ссылок постоянного размера."""
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+class EstimatedCountPaginator(FeedPaginator):
+    """FeedPaginator, который берёт число публикаций из кэша.
+
+    ``count_scope`` — область ленты (blog.caching), чей счётчик
+    поддерживают сигналы. Для больших лент число приблизительное:
+    последняя страница может оказаться неполной или пустой.
+    """
+
+    def __init__(self, object_list, per_page, count_scope, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_scope = count_scope
+
+    @cached_property
+    def count(self):
+        return feed_count(self.count_scope, self.object_list)
+
+
+class KeysetPage(collections.abc.Sequence):
+    """Страница ленты, полученная по курсору, а не по номеру."""
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Пагинация по ключу (поле сортировки, id) — без COUNT(*) и OFFSET.
+
+    Стоимость любой страницы одинакова: запрос продолжает выборку
+    с места, закодированного в непрозрачном курсоре ``?cursor=``.
+    По умолчанию — лента публикаций «от новых к старым» по pub_date.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, per_page,
+                 ordering_field='pub_date', descending=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering_field = ordering_field
+        self.descending = descending
+
+    def encode_cursor(self, direction, obj):
+        value = getattr(obj, self.ordering_field)
+        raw = f'{direction}|{value.isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Вернуть (direction, value, pk) или None для битого курсора."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            direction, value, pk = raw.split('|')
+            if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+                return None
+            return direction, datetime.fromisoformat(value), int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            return None
+
+    def _seek(self, value, pk, after):
+        """Объекты строго после (или до) позиции в порядке сортировки."""
+        lookup = 'lt' if self.descending == after else 'gt'
+        field = self.ordering_field
+        return self.object_list.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'pk__{lookup}': pk})
+        )
+
+    def _ordering(self, reverse=False):
+        if self.descending != reverse:
+            return f'-{self.ordering_field}', '-pk'
+        return self.ordering_field, 'pk'
+
+    def get_page(self, cursor=None):
+        position = self.decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._forward_page(self.object_list, has_previous=False)
+        direction, value, pk = position
+        if direction == CURSOR_NEXT:
+            return self._forward_page(
+                self._seek(value, pk, after=True), has_previous=True
+            )
+        return self._backward_page(self._seek(value, pk, after=False))
+
+    def _forward_page(self, objects, has_previous):
+        rows = list(
+            objects.order_by(*self._ordering())[:self.per_page + 1]
+        )
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._make_page(rows, has_next, has_previous)
+
+    def _backward_page(self, objects):
+        rows = list(
+            objects.order_by(*self._ordering(reverse=True))
+            [:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._make_page(rows, True, has_previous)
+
+    def _make_page(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(CURSOR_NEXT, rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(CURSOR_PREVIOUS, rows[0])
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
+
+
+def paginate_posts(request, posts, per_page=POSTS_PER_PAGE, count_scope=None):
+    """Разбить ленту публикаций на страницы.
+
+    Курсорный режим включается настройкой ``BLOG_PAGINATION = 'keyset'``
+    или наличием ``?cursor=`` в запросе; иначе — обычная пагинация
+    по номеру страницы. Если передан ``count_scope``, число публикаций
+    для неё берётся из кэша (EstimatedCountPaginator).
+    """
+    cursor = request.GET.get('cursor')
+    mode = getattr(settings, 'BLOG_PAGINATION', 'offset')
+    if cursor or mode == 'keyset':
+        return KeysetPaginator(posts, per_page).get_page(cursor)
+    if count_scope is not None:
+        paginator = EstimatedCountPaginator(posts, per_page, count_scope)
+    else:
+        paginator = FeedPaginator(posts, per_page)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def paginate_comments(request, comments, per_page=COMMENTS_PER_PAGE):
+    """Комментарии по порядку добавления, страницами по курсору."""
+    return KeysetPaginator(
+        comments, per_page, ordering_field='created_at', descending=False
+    ).get_page(request.GET.get('cursor'))
@@ -0,0 +1,70 @@
+"""Когда в следующий раз изменится набор видимых публикаций.
+
+Отложенная публикация становится видна в момент своего ``pub_date``,
+поэтому любой кэш лент устаревает не позже этого момента. Ближайшая
+такая дата хранится в кэше и пересчитывается после коммита записи
+публикаций и категорий (blog.signals), когда она уже наступила или
+истёк срок ``BLOG_NEXT_PUBLICATION_TIMEOUT`` — тогда же наступившие
+публикации вносятся в материализованную ленту (blog.feed).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .feed import promote_due_posts
+from .models import Post
+from .state import state_cache
+
+NEXT_PUBLICATION_KEY = 'blog:next_publication'
+# Отложенных публикаций нет: None в кэше неотличим от промаха
+NO_PUBLICATION = 'none'
+
+
+def refresh_next_publication():
+    next_pub_date = Post.objects.filter(
+        is_published=True,
+        pub_date__gt=timezone.now(),
+        category__is_published=True,
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+    state_cache.set(
+        NEXT_PUBLICATION_KEY, next_pub_date or NO_PUBLICATION,
+        settings.BLOG_NEXT_PUBLICATION_TIMEOUT
+    )
+    return next_pub_date
+
+
+def refresh_next_publication_on_commit():
+    # Пересчёт внутри транзакции записал бы в общий кэш ещё не
+    # зафиксированное (или откаченное) состояние. До коммита дату
+    # пересчитывает по запросу next_publication
+    state_cache.delete(NEXT_PUBLICATION_KEY)
+    transaction.on_commit(refresh_next_publication)
+
+
+def next_publication():
+    """Дата ближайшей отложенной публикации или None."""
+    next_pub_date = state_cache.get(NEXT_PUBLICATION_KEY)
+    if next_pub_date == NO_PUBLICATION:
+        return None
+    if next_pub_date is None or next_pub_date <= timezone.now():
+        # Отложенная публикация стала видимой (или кэш очищен):
+        # сначала вносим её в ленту
+        promote_due_posts()
+        return refresh_next_publication()
+    return next_pub_date
+
+
+def seconds_until_next_publication():
+    next_pub_date = next_publication()
+    if next_pub_date is None:
+        return None
+    return max(1, int((next_pub_date - timezone.now()).total_seconds()) + 1)
+
+
+def cap_by_next_publication(seconds):
+    """Ограничить срок жизни кэша моментом ближайшей публикации."""
+    until_publication = seconds_until_next_publication()
+    if until_publication is None:
+        return seconds
+    return min(seconds, until_publication)
@@ -0,0 +1,129 @@
+"""Чтение с реплик, запись в основную базу.
+
+PrimaryReplicaRouter отправляет чтения на случайную базу из
+``BLOG_READ_REPLICAS`` (псевдонимы из DATABASES), а запись — всегда
+в ``default``. Реплика отстаёт от основной базы, поэтому чтение
+остаётся на основной базе:
+
+* внутри transaction.atomic() на основной базе;
+* до конца HTTP-запроса, в котором уже была запись;
+* ещё ``BLOG_REPLICA_PIN_SECONDS`` секунд после такого запроса —
+  ReplicaPinMiddleware ставит cookie. Так автор видит свой комментарий
+  сразу после перенаправления из add_comment.
+
+Считаются только записи в запросах, меняющих данные (POST и т. п.):
+служебные записи при просмотре страниц — сессия, last_login, перенос
+отложенных публикаций в ленту — пользователя к основной базе
+не привязывают.
+"""
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .concurrency import enable_async_mode
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_COOKIE = 'blog_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class RoutingState:
+    """Состояние маршрутизации одного HTTP-запроса."""
+
+    def __init__(self, pinned=False, track_writes=True):
+        self.pinned = pinned
+        self.track_writes = track_writes
+        self.written = False
+
+
+# Объект общий для запроса: sync_to_async копирует контекст в поток,
+# а изменения атрибутов видны и после возврата из него
+routing_state = ContextVar('routing_state', default=None)
+
+
+def read_replicas():
+    return getattr(settings, 'BLOG_READ_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = read_replicas()
+        if not replicas:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаем оттуда же, откуда сам объект
+            return instance._state.db
+        state = routing_state.get()
+        if state is not None and (state.pinned or state.written):
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None and state.track_writes:
+            state.written = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *read_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от основной базы
+        if db in read_replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        enable_async_mode(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = self.routing_state(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        state = self.routing_state(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.pin(state, response)
+
+    @staticmethod
+    def routing_state(request):
+        return RoutingState(
+            pinned=PIN_COOKIE in request.COOKIES,
+            track_writes=request.method not in SAFE_METHODS,
+        )
+
+    @staticmethod
+    def pin(state, response):
+        if state.written and read_replicas():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.BLOG_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,150 @@
+"""Полнотекстовый поиск по публикациям.
+
+Индекс ведёт бэкенд, заданный настройкой ``BLOG_SEARCH_BACKEND``.
+По умолчанию это виртуальная таблица SQLite FTS5; для другой СУБД
+(например, PostgreSQL с tsvector) достаточно реализовать методы
+:class:`SearchBackend` и указать путь к классу в настройках.
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+SearchHit = namedtuple('SearchHit', ['post_id', 'snippet'])
+
+# Маркеры совпадений в сниппете FTS5: их не может быть в тексте после
+# экранирования, поэтому они безопасно заменяются на <mark>
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+SNIPPET_WORDS = 16
+
+WORD_RE = re.compile(r'\w+')
+
+
+def highlight(raw_snippet):
+    return mark_safe(
+        escape(raw_snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+class SearchBackend:
+    """Интерфейс бэкенда поиска."""
+
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def rebuild(self, posts):
+        """Пересоздать индекс по итерируемому набору публикаций."""
+        raise NotImplementedError
+
+    def search(self, query, limit=None):
+        """Список SearchHit, от самых релевантных к менее релевантным."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """Поиск по таблице blog_post_fts (создаётся миграцией)."""
+
+    table = 'blog_post_fts'
+
+    @staticmethod
+    def build_match(query):
+        # Каждое слово — в кавычках, чтобы пользовательский ввод
+        # не разбирался как синтаксис FTS5; последнее — по префиксу
+        words = WORD_RE.findall(query)
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, text) '
+                'VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.text],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self, posts):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, text) '
+                'VALUES (%s, %s, %s)',
+                ((post.pk, post.title, post.text) for post in posts),
+            )
+
+    def search(self, query, limit=None):
+        match = self.build_match(query)
+        if match is None:
+            return []
+        sql = (
+            f'SELECT rowid, snippet({self.table}, -1, %s, %s, %s, %s) '
+            f'FROM {self.table} WHERE {self.table} MATCH %s '
+            f'ORDER BY bm25({self.table}, 10.0, 1.0)'
+        )
+        params = [MATCH_START, MATCH_END, '…', SNIPPET_WORDS, match]
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                SearchHit(post_id, highlight(snippet))
+                for post_id, snippet in cursor.fetchall()
+            ]
+
+
+class DatabaseLikeBackend(SearchBackend):
+    """Запасной вариант без индекса: LIKE по заголовку и тексту."""
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self, posts):
+        pass
+
+    def search(self, query, limit=None):
+        from .models import Post
+
+        words = WORD_RE.findall(query)
+        if not words:
+            return []
+        condition = Q()
+        for word in words:
+            condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        rows = Post.objects.filter(condition).values_list('pk', 'text')
+        if limit is not None:
+            rows = rows[:limit]
+        return [
+            SearchHit(pk, escape(Truncator(text).words(SNIPPET_WORDS)))
+            for pk, text in rows
+        ]
+
+
+def get_search_backend():
+    return import_string(settings.BLOG_SEARCH_BACKEND)()
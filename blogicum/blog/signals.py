@@ -0,0 +1,258 @@
+from django.core.files.images import get_image_dimensions
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .caching import (
+    GLOBAL_SCOPE, INDEX_SCOPE, adjust_feed_counts, author_scope,
+    bump_versions, category_scope, post_scope
+)
+from .feed import refresh_feed
+from .models import (
+    Category, Comment, FeedEntry, Location, MediaFile, Post, User,
+    deleting_posts
+)
+from .publication import refresh_next_publication_on_commit
+from .search import get_search_backend
+from .tasks import enqueue
+
+
+def post_scopes(post_id):
+    """Области кэша, в которых показывается публикация."""
+    scopes = set()
+    rows = Post.objects.filter(pk=post_id).values_list(
+        'category__slug', 'author__username'
+    )
+    for category_slug, username in rows:
+        scopes.add(INDEX_SCOPE)
+        scopes.add(post_scope(post_id))
+        scopes.add(author_scope(username))
+        if category_slug:
+            scopes.add(category_scope(category_slug))
+    return scopes
+
+
+def counted_scopes(post_id):
+    """Ленты со счётчиками публикаций, в которых видна публикация."""
+    scopes = set()
+    rows = Post.objects.published().filter(pk=post_id).values_list(
+        'category__slug', 'author__username'
+    )
+    for category_slug, username in rows:
+        scopes.update((
+            INDEX_SCOPE, category_scope(category_slug), author_scope(username)
+        ))
+    return scopes
+
+
+def change_media_references(name, delta):
+    """Изменить счётчик ссылок на файл изображения на ``delta``."""
+    if not name:
+        return
+    files = MediaFile.objects.filter(name=name)
+    if delta < 0:
+        files.filter(ref_count__gte=-delta).update(
+            ref_count=F('ref_count') + delta
+        )
+    elif not files.update(ref_count=F('ref_count') + delta):
+        _, created = MediaFile.objects.get_or_create(
+            name=name, defaults={'ref_count': delta}
+        )
+        if not created:
+            # Строку только что создал параллельный запрос
+            files.update(ref_count=F('ref_count') + delta)
+
+
+def invalidate(scopes):
+    # Сразу — чтобы текущий поток не увидел старую страницу, и после
+    # коммита — чтобы выбросить страницы, закэшированные параллельными
+    # запросами по ещё не зафиксированным данным.
+    if scopes:
+        bump_versions(scopes)
+        transaction.on_commit(lambda: bump_versions(scopes))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw, **kwargs):
+    # При loaddata (raw) счётчики чинит команда recount_comments
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+        FeedEntry.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+    invalidate(post_scopes(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    # Публикация удаляется вместе с комментариями: её счётчики и кэш
+    # по каждому комментарию не трогаем
+    if instance.post_id in deleting_posts.get():
+        return
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+    FeedEntry.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(comment_count=F('comment_count') - 1)
+    invalidate(post_scopes(instance.post_id))
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_post_scopes(sender, instance, **kwargs):
+    # Старые категория и автор: публикация должна исчезнуть и оттуда
+    instance._feed_scopes = post_scopes(instance.pk) if instance.pk else set()
+    instance._counted_scopes = (
+        counted_scopes(instance.pk) if instance.pk else set()
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_image_upload(sender, instance, raw, **kwargs):
+    # Файл ещё не сохранён в хранилище — значит, его только что загрузили
+    instance._image_uploaded = (
+        not raw and bool(instance.image)
+        and not instance.image._committed
+    )
+    if instance._image_uploaded:
+        instance.image_status = Post.IMAGE_PROCESSING
+        # Ширина по самой загрузке: файл в хранилище ещё не записан.
+        # Точную (после поворота по EXIF) запишет process_post_image
+        instance.image_width, _ = get_image_dimensions(instance.image.file)
+    elif not instance.image:
+        instance.image_width = None
+
+
+@receiver(pre_save, sender=Post)
+def remember_image_name(sender, instance, **kwargs):
+    instance._old_image_name = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('image', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, raw, **kwargs):
+    # При loaddata (raw) счётчики чинит команда collect_media --recount
+    old_name = getattr(instance, '_old_image_name', None)
+    new_name = instance.image.name if instance.image else None
+    if not raw and old_name != new_name:
+        change_media_references(new_name, 1)
+        change_media_references(old_name, -1)
+
+
+@receiver(post_save, sender=Post)
+def process_uploaded_image(sender, instance, **kwargs):
+    if getattr(instance, '_image_uploaded', False):
+        enqueue('process_post_image', post_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def update_feed_entry(sender, instance, raw, **kwargs):
+    # При loaddata (raw) ленту пересобирает import_blog
+    if not raw:
+        refresh_feed(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    invalidate(
+        getattr(instance, '_feed_scopes', set()) | post_scopes(instance.pk)
+    )
+    # Публикация могла появиться в лентах, исчезнуть из них
+    # или перейти в другую категорию
+    old_scopes = getattr(instance, '_counted_scopes', set())
+    new_scopes = counted_scopes(instance.pk)
+    adjust_feed_counts(new_scopes - old_scopes, 1)
+    adjust_feed_counts(old_scopes - new_scopes, -1)
+    refresh_next_publication_on_commit()
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_feeds(sender, instance, **kwargs):
+    change_media_references(instance.image.name, -1)
+    invalidate(getattr(instance, '_feed_scopes', set()))
+    adjust_feed_counts(getattr(instance, '_counted_scopes', set()), -1)
+    refresh_next_publication_on_commit()
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, raw, update_fields, **kwargs):
+    # Имя и данные автора видны на его странице профиля; вход на сайт
+    # сохраняет только last_login, которого на страницах нет
+    if raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate({author_scope(instance.get_username())})
+
+
+@receiver(post_save, sender=User)
+def update_feed_author(sender, instance, raw, update_fields, **kwargs):
+    # Вход на сайт сохраняет только last_login
+    if raw or (update_fields and 'username' not in update_fields):
+        return
+    FeedEntry.objects.filter(post__author=instance).exclude(
+        author_username=instance.username
+    ).update(author_username=instance.username)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, **kwargs):
+    instance._feed_state = Category.objects.filter(
+        pk=instance.pk
+    ).values_list('is_published', 'slug', 'title').first()
+
+
+@receiver(post_save, sender=Category)
+def update_category_feed(sender, instance, created, raw, **kwargs):
+    # У новой категории ещё нет публикаций; при loaddata (raw) ленту
+    # пересобирает import_blog
+    state = (instance.is_published, instance.slug, instance.title)
+    if raw or created or instance._feed_state == state:
+        return
+    # У категории могут быть сотни тысяч публикаций: их обходит пачками
+    # фоновая задача, а не запрос админки (она сообщает номер задачи);
+    # до конца обхода записи снятой категории отбрасывает visible_entries
+    instance._feed_task = enqueue(
+        'sync_category_feed', category_id=instance.pk
+    )
+
+
+@receiver(pre_delete, sender=Category)
+def remove_category_feed(sender, instance, **kwargs):
+    # Публикации останутся без категории — а значит, вне лент
+    FeedEntry.objects.filter(post__category=instance).delete()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_feeds(sender, **kwargs):
+    invalidate({GLOBAL_SCOPE})
+    refresh_next_publication_on_commit()
+
+
+@receiver(post_save, sender=Location)
+def update_location_feed(sender, instance, raw, **kwargs):
+    if not raw:
+        FeedEntry.objects.filter(post__location=instance).update(
+            location_name=instance.name if instance.is_published else None
+        )
+
+
+@receiver(pre_delete, sender=Location)
+def remove_location_feed(sender, instance, **kwargs):
+    FeedEntry.objects.filter(post__location=instance).update(
+        location_name=None
+    )
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_all_feeds(sender, **kwargs):
+    invalidate({GLOBAL_SCOPE})
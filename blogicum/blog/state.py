@@ -0,0 +1,13 @@
+"""Служебное состояние лент в общем кэше без вытеснения.
+
+Версии областей (blog.caching), дата ближайшей публикации
+(blog.publication) и отметка внесённых в ленту публикаций (blog.feed)
+хранятся в кэше ``state``: вытеснение записей из кэша страниц их не
+затрагивает.
+"""
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+STATE_CACHE_ALIAS = 'state'
+
+state_cache = ConnectionProxy(caches, STATE_CACHE_ALIAS)
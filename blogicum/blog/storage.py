@@ -0,0 +1,104 @@
+"""Хранилище изображений публикаций с адресацией по содержимому.
+
+Файл сохраняется под именем из SHA-256 его содержимого:
+``posts/3f/3f9a…c1.jpg``. Повторная загрузка того же файла не пишет
+на диск ничего нового — возвращается имя уже сохранённой копии.
+Поэтому содержимое по имени никогда не меняется, и такие файлы можно
+отдавать с «вечными» заголовками кэширования.
+
+Производные файлы (уменьшенные копии ``<хэш>.w640.webp``, см.
+blog.images) сохраняются под переданным именем: оно уже определено
+хэшем оригинала.
+
+Сколько публикаций ссылается на файл, хранит модель MediaFile
+(поддерживается сигналами); осиротевшие файлы удаляет команда
+``manage.py collect_media``.
+"""
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def content_digest(content):
+    # Потоковый обработчик загрузок (blog.uploads) считает хэш на лету
+    if getattr(content, 'sha256', None):
+        return content.sha256
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_name(name):
+    """Вернуть (хэш, признак производного файла) или (None, False)."""
+    parts = posixpath.basename(name).split('.')
+    if len(parts) < 2 or not DIGEST_RE.match(parts[0]):
+        return None, False
+    return parts[0], len(parts) > 2
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def hashed_name(self, name, digest):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        _, derived = split_name(name)
+        if derived:
+            if self.exists(name):
+                self.delete(name)
+        else:
+            name = self.hashed_name(name, content_digest(content))
+            if self.exists(name):
+                # Такой файл уже есть: продлеваем ему жизнь для
+                # collect_media и ничего не пишем
+                os.utime(self.path(name))
+                return name
+        try:
+            return super().save(name, content, max_length)
+        except FileExistsError:
+            # Тот же файл одновременно записала параллельная загрузка
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым: суффиксы вида photo_a1b2c3.jpg
+        # недопустимы
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+    def originals(self, directory=''):
+        """Имена всех оригиналов (не производных файлов) в каталоге."""
+        if not self.exists(directory):
+            return
+        directories, files = self.listdir(directory)
+        for name in files:
+            digest, derived = split_name(name)
+            if digest and not derived:
+                yield posixpath.join(directory, name)
+        for subdirectory in directories:
+            yield from self.originals(posixpath.join(directory, subdirectory))
+
+    def derived_names(self, name):
+        """Имена производных файлов оригинала ``name``."""
+        directory = posixpath.dirname(name)
+        digest, _ = split_name(name)
+        return [
+            posixpath.join(directory, file_name)
+            for file_name in self.listdir(directory)[1]
+            if file_name.startswith(f'{digest}.') and split_name(file_name)[1]
+        ]
@@ -0,0 +1,95 @@
+"""Локальная очередь фоновых задач на таблице blog.Task.
+
+Задача — функция, зарегистрированная декоратором :func:`task`
+(модули с задачами импортируются в BlogConfig.ready).
+:func:`enqueue` добавляет строку в очередь в той же транзакции, что
+и изменения, породившие задачу, поэтому воркер (``manage.py run_tasks``)
+увидит её только после фиксации. При ``BLOG_TASKS_EAGER = True`` задача
+выполняется сразу после коммита в текущем процессе.
+
+Задачу, которая дольше ``BLOG_TASK_TIMEOUT`` остаётся в состоянии
+«выполняется», считаем брошенной упавшим воркером: следующий
+:func:`claim_tasks` возвращает её в очередь, пока не исчерпано
+``BLOG_TASK_MAX_ATTEMPTS`` попыток.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(func):
+    TASKS[func.__name__] = func
+    return func
+
+
+def enqueue(name, **kwargs):
+    if name not in TASKS:
+        raise KeyError(f'Неизвестная задача: {name}')
+    if getattr(settings, 'BLOG_TASKS_EAGER', False):
+        transaction.on_commit(lambda: TASKS[name](**kwargs))
+        return None
+    return Task.objects.create(name=name, kwargs=kwargs)
+
+
+def reclaim_stale_tasks():
+    """Вернуть в очередь брошенные задачи; вернуть их число."""
+    now = timezone.now()
+    deadline = now - timedelta(seconds=settings.BLOG_TASK_TIMEOUT)
+    stale = Task.objects.filter(
+        Q(started_at__isnull=True) | Q(started_at__lt=deadline),
+        status=Task.RUNNING,
+    )
+    failed = stale.filter(
+        attempts__gte=settings.BLOG_TASK_MAX_ATTEMPTS
+    ).update(
+        status=Task.FAILED, finished_at=now,
+        error='Превышено время выполнения задачи.',
+    )
+    reclaimed = stale.update(status=Task.PENDING)
+    if failed or reclaimed:
+        logger.warning(
+            'Брошенных задач: возвращено в очередь %s, с ошибкой %s',
+            reclaimed, failed,
+        )
+    return reclaimed
+
+
+def claim_tasks(limit):
+    """Забрать до ``limit`` задач из очереди; вернуть их id."""
+    reclaim_stale_tasks()
+    claimed = []
+    pending = Task.objects.filter(status=Task.PENDING).order_by('pk')
+    for task_id in pending.values_list('pk', flat=True)[:limit]:
+        # Условный UPDATE: задачу, которую уже забрал другой воркер,
+        # повторно не берём
+        if Task.objects.filter(pk=task_id, status=Task.PENDING).update(
+                status=Task.RUNNING, started_at=timezone.now(),
+                attempts=F('attempts') + 1):
+            claimed.append(task_id)
+    return claimed
+
+
+def run_task(task_id):
+    queued = Task.objects.get(pk=task_id)
+    try:
+        TASKS[queued.name](**queued.kwargs)
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', queued)
+        queued.status = Task.FAILED
+        queued.error = traceback.format_exc()
+    else:
+        queued.status = Task.DONE
+    queued.finished_at = timezone.now()
+    queued.save(update_fields=['status', 'error', 'finished_at'])
+    return queued.status
@@ -0,0 +1,32 @@
+from django import template
+from django.template.loader import get_template
+
+from blog.caching import cached_fragments
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, batch=None):
+    """Карточка публикации из кэша фрагментов (blog.caching).
+
+    ``batch`` — все публикации страницы: карточки для них достаются
+    из кэша одним запросом при выводе первой.
+    """
+    card_template = get_template(CARD_TEMPLATE)
+    if getattr(post, 'search_snippet', None):
+        # Сниппет зависит от запроса поиска — такие карточки не кэшируем
+        return card_template.render({'post': post})
+    cards = context.render_context.setdefault('blog_post_cards', {})
+    if post.pk not in cards:
+        cards.update(cached_fragments(
+            [
+                item for item in (batch or [post])
+                if item.pk not in cards
+                and not getattr(item, 'search_snippet', None)
+            ],
+            lambda item: card_template.render({'post': item}),
+        ))
+    return cards[post.pk]
@@ -0,0 +1,45 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from blog.images import renditions
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 640px) 100vw, 640px'
+
+
+def srcset(storage, names):
+    return ', '.join(f'{storage.url(name)} {width}w' for name, width in names)
+
+
+@register.simple_tag
+def post_image(post, css_class='', sizes=DEFAULT_SIZES):
+    """<picture> с WebP и JPEG копиями изображения под ширину экрана."""
+    image = post.image
+    if not image:
+        return ''
+    if post.image_status == post.IMAGE_PROCESSING:
+        return format_html(
+            '<img class="{}" src="{}" alt="Изображение обрабатывается">',
+            css_class, static('img/image-processing.svg'),
+        )
+    storage = image.storage
+    copies = renditions(image)
+    img_attrs = [('class', css_class), ('src', image.url)]
+    if not copies['jpg']:
+        return format_html(
+            '<img{}>', format_html_join('', ' {}="{}"', img_attrs)
+        )
+    original = [(image.name, post.image_width)]
+    img_attrs += [
+        ('srcset', srcset(storage, copies['jpg'] + original)),
+        ('sizes', sizes),
+    ]
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img{}></picture>',
+        srcset(storage, copies['webp']),
+        sizes,
+        format_html_join('', ' {}="{}"', img_attrs),
+    )
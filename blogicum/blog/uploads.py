@@ -0,0 +1,161 @@
+"""Потоковый приём изображений публикаций.
+
+Стандартные обработчики Django складывают загрузку во временный файл
+(или в память), а хранилище потом копирует её ещё раз. Здесь поле
+``image`` пишется кусками прямо в каталог MEDIA_ROOT: по ходу приёма
+считается SHA-256 и разбирается заголовок изображения, а при сохранении
+ContentAddressedStorage лишь переименовывает готовый файл.
+
+Слишком большой файл или изображение с недопустимыми размерами
+отклоняются, как только это становится известно: остаток файла парсер
+пропускает, ничего не записывая, а остальные поля формы разбирает
+как обычно — форма вернётся с ошибкой у изображения и введённым текстом.
+"""
+import hashlib
+import os
+import tempfile
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    TemporaryUploadedFile, UploadedFile
+)
+from django.core.files.uploadhandler import (
+    FileUploadHandler, SkipFile, StopFutureHandlers
+)
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+IMAGE_FIELD = 'image'
+INCOMING_DIR = '.incoming'
+# Дальше этого заголовок изображения не ищем
+MAX_HEADER_BYTES = 512 * 1024
+
+
+class StreamedImageUpload(TemporaryUploadedFile):
+    """Временный файл загрузки рядом с MEDIA_ROOT и хэш его содержимого."""
+
+    def __init__(self, name, content_type, charset, directory):
+        _, extension = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload' + extension, dir=directory
+        )
+        UploadedFile.__init__(self, file, name, content_type, 0, charset)
+        self.sha256 = None
+
+
+class PostImageUploadHandler(FileUploadHandler):
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.upload = None
+        self.digest = None
+        self.header = None
+
+    def incoming_dir(self):
+        from .models import Post
+
+        storage = Post._meta.get_field(IMAGE_FIELD).storage
+        try:
+            directory = storage.path(INCOMING_DIR)
+        except NotImplementedError:
+            return settings.FILE_UPLOAD_TEMP_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def reject(self, message):
+        # Ошибку покажет форма (см. add_upload_errors)
+        self.request.upload_errors = {IMAGE_FIELD: message}
+        if self.upload is not None:
+            self.upload.close()
+            self.upload = None
+        raise SkipFile()
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        if field_name != IMAGE_FIELD:
+            return
+        if (self.content_length
+                and self.content_length > settings.BLOG_UPLOAD_MAX_SIZE):
+            self.reject(size_error())
+        self.upload = StreamedImageUpload(
+            file_name, self.content_type, self.charset, self.incoming_dir()
+        )
+        self.digest = hashlib.sha256()
+        self.header = b''
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload is None:
+            return raw_data
+        if start + len(raw_data) > settings.BLOG_UPLOAD_MAX_SIZE:
+            self.reject(size_error())
+        if self.header is not None:
+            self.check_header(raw_data)
+        self.digest.update(raw_data)
+        self.upload.write(raw_data)
+        return None
+
+    def check_header(self, raw_data):
+        # Image.open читает только заголовок и не декодирует пиксели,
+        # поэтому его можно повторять по мере поступления данных
+        self.header += raw_data
+        limit = settings.BLOG_UPLOAD_MAX_DIMENSION
+        dimension_error = (
+            f'Изображение не должно быть больше {limit}×{limit} пикселей.'
+        )
+        try:
+            picture = Image.open(BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.reject(dimension_error)
+        except OSError:
+            if len(self.header) > MAX_HEADER_BYTES:
+                self.reject('Загрузите правильное изображение.')
+            return
+        self.header = None
+        if max(picture.size) > limit:
+            self.reject(dimension_error)
+
+    def file_complete(self, file_size):
+        if self.upload is None:
+            return None
+        upload, self.upload = self.upload, None
+        upload.flush()
+        upload.seek(0)
+        upload.size = file_size
+        upload.sha256 = self.digest.hexdigest()
+        return upload
+
+    def upload_interrupted(self):
+        if self.upload is not None:
+            self.upload.close()
+            self.upload = None
+
+
+def size_error():
+    limit = filesizeformat(settings.BLOG_UPLOAD_MAX_SIZE)
+    return f'Размер файла не должен превышать {limit}.'
+
+
+def stream_post_image(view):
+    """Принимать изображение публикации обработчиком PostImageUploadHandler.
+
+    Обработчики загрузки нужно подменить до того, как CsrfViewMiddleware
+    прочитает request.POST, поэтому проверка CSRF переносится внутрь.
+    """
+    protected_view = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, PostImageUploadHandler(request))
+        return protected_view(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
+
+
+def add_upload_errors(request, form):
+    """Перенести в форму ошибки, из-за которых загрузка была прервана."""
+    for field, message in getattr(request, 'upload_errors', {}).items():
+        form.add_error(field, message)
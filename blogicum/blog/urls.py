@@ -1,23 +1,32 @@
 from django.urls import path
 from . import views
+from .concurrency import route_view
 
 app_name = 'blog'
 
 urlpatterns = [
     # Основные страницы
-    path('', views.index, name='index'),
+    path('', route_view(views.index), name='index'),
     path(
         'category/<slug:category_slug>/',
-        views.category_posts,
+        route_view(views.category_posts),
         name='category_posts'),
+    path('search/', views.search, name='search'),
 
     # Работа с постами
     path('posts/create/', views.post_create, name='create_post'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/',
+        route_view(views.post_detail),
+        name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='edit_post'),
     path('posts/<int:post_id>/delete/', views.post_delete, name='delete_post'),
 
     # Работа с комментариями
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -34,12 +43,12 @@ urlpatterns = [
     ),
     path(
         'profile/<str:username>/',
-        views.profile,
+        route_view(views.profile),
         name='profile'
     ),
     path(
         'posts/<int:id>/',
-        views.post_detail,
+        route_view(views.post_detail),
         name='detail'
     ),
 ]
@@ -1,12 +1,22 @@
 from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
-from .models import Post, Comment, Category
+from .models import Post, Comment, Category, FeedEntry
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Count
+from django.conf import settings
+from django.db import transaction
+from .concurrency import async_view
+from .feed import visible_entries
+from .caching import (
+    INDEX_SCOPE, author_scope, cache_feed, category_scope, post_scope
+)
+from .paginators import (
+    POSTS_PER_PAGE, FeedPaginator, paginate_comments, paginate_posts
+)
+from .search import get_search_backend
+from .uploads import add_upload_errors, stream_post_image
 
 User = get_user_model()
 
@@ -35,15 +45,12 @@ class CommentForm(forms.ModelForm):
 
 
 # Index view: show only published posts up to now
+@async_view
+@cache_feed(INDEX_SCOPE)
 def index(request):
-    posts = Post.objects.filter(
-        is_published=True,
-        pub_date__lte=timezone.now(),
-        category__is_published=True
-    ).annotate(comment_count=Count('comments')).order_by('-pub_date')
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Материализованная лента (blog.feed): только видимые публикации
+    posts = visible_entries().order_by('-pub_date')
+    page_obj = paginate_posts(request, posts, count_scope=INDEX_SCOPE)
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
@@ -84,36 +91,64 @@ def post_card(request, id):
     )
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(
-        Post.objects.annotate(
-            comment_count=Count('comments')),
-        pk=post_id)
+def get_visible_post(request, post_id, queryset=Post.objects):
+    # Authors can view their own drafts or scheduled posts
+    post = get_object_or_404(queryset, pk=post_id)
     if (not post.is_published or post.pub_date
-            > timezone.now()) and post.author != request.user:
+            > timezone.now()) and post.author_id != request.user.pk:
         raise Http404
-    comments = post.comments.select_related('author').order_by('created_at')
+    return post
+
+
+def find_post_for_detail(request, post_id):
+    return get_visible_post(
+        request, post_id,
+        Post.objects.select_related('author', 'category', 'location'))
+
+
+@async_view
+@cache_feed(post_scope('{post_id}'), lookup=find_post_for_detail)
+def post_detail(request, post_id, obj):
+    post = obj
+    # Inline only the first page; the rest comes from post_comments
+    comments = paginate_comments(
+        request, post.comments.select_related('author'))
     form = CommentForm()
     return render(request, 'blog/detail.html',
                   {'post': post, 'comments': comments, 'form': form})
 
+
+# Next batch of comments as an HTML fragment for the detail page
+@cache_feed(post_scope('{post_id}'), lookup=get_visible_post)
+def post_comments(request, post_id, obj):
+    post = obj
+    comments = paginate_comments(
+        request, post.comments.select_related('author'))
+    return render(request, 'includes/comments_page.html',
+                  {'post': post, 'comments': comments})
+
 # Category posts view
 
 
-def category_posts(request, category_slug):
-    category = get_object_or_404(
+def find_published_category(request, category_slug):
+    return get_object_or_404(
         Category,
         slug=category_slug,
         is_published=True)
-    posts = Post.objects.filter(
-        category=category,
-        is_published=True,
-        pub_date__lte=timezone.now(),
-        category__is_published=True,
-    ).annotate(comment_count=Count('comments')).order_by('-pub_date')
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+
+
+@async_view
+@cache_feed(
+    category_scope('{category_slug}'), lookup=find_published_category
+)
+def category_posts(request, category_slug, obj):
+    category = obj
+    posts = FeedEntry.objects.filter(
+        category_slug=category.slug
+    ).order_by('-pub_date')
+    page_obj = paginate_posts(
+        request, posts, count_scope=category_scope(category.slug)
+    )
     return render(
         request,
         'blog/index.html',
@@ -124,9 +159,33 @@ def category_posts(request, category_slug):
     )
 
 
+# Full-text search over the posts visible on the index page
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = []
+    if query:
+        hits = get_search_backend().search(
+            query, limit=settings.BLOG_SEARCH_MAX_RESULTS)
+        visible = Post.objects.published().for_feed().in_bulk(
+            [hit.post_id for hit in hits])
+        for hit in hits:
+            if hit.post_id in visible:
+                post = visible[hit.post_id]
+                post.search_snippet = hit.snippet
+                posts.append(post)
+    page_obj = FeedPaginator(posts, POSTS_PER_PAGE).get_page(
+        request.GET.get('page'))
+    return render(request, 'blog/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+    })
+
+
+@stream_post_image
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
+    add_upload_errors(request, form)
     if form.is_valid():
         obj = form.save(commit=False)
         obj.author = request.user
@@ -135,6 +194,7 @@ def post_create(request):
     return render(request, 'blog/create.html', {'form': form})
 
 
+@stream_post_image
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -144,6 +204,7 @@ def post_edit(request, post_id):
         request.POST or None,
         files=request.FILES or None,
         instance=post)
+    add_upload_errors(request, form)
     if form.is_valid():
         form.save()
         return redirect('blog:post_detail', post_id)
@@ -151,6 +212,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def post_delete(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -162,6 +224,7 @@ def post_delete(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -190,6 +253,7 @@ def edit_comment(request, post_id, comment_id):
 
 
 @login_required
+@transaction.atomic
 def delete_comment(request, post_id, comment_id):
     # Если пользователь не автор — будет 404
     comment = get_object_or_404(Comment, id=comment_id, author=request.user)
@@ -210,23 +274,24 @@ def delete_comment(request, post_id, comment_id):
 # User profile view
 
 
-def profile(request, username):
-    profile_user = get_object_or_404(User, username=username)
+def find_profile_user(request, username):
+    return get_object_or_404(User, username=username)
+
+
+@async_view
+@cache_feed(author_scope('{username}'), lookup=find_profile_user)
+def profile(request, username, obj):
+    profile_user = obj
+    count_scope = None
     if request.user == profile_user:
         # автор видит все свои посты
-        posts = Post.objects.filter(author=profile_user).annotate(
-            comment_count=Count('comments')).order_by('-pub_date')
+        posts = Post.objects.filter(author=profile_user).for_feed()
     else:
         # остальные только опубликованные и по опубликованным категориям
-        posts = Post.objects.filter(
-            author=profile_user,
-            is_published=True,
-            pub_date__lte=timezone.now(),
-            category__is_published=True,
-        ).annotate(comment_count=Count('comments')).order_by('-pub_date')
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        posts = Post.objects.published().filter(
+            author=profile_user).for_feed()
+        count_scope = author_scope(username)
+    page_obj = paginate_posts(request, posts, count_scope=count_scope)
     return render(request, 'blog/profile.html', {
         'profile_user': profile_user,
         'page_obj': page_obj
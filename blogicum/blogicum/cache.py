@@ -0,0 +1,33 @@
+"""Файловые кэши проекта: для страниц и для служебного состояния.
+
+FileBasedCache перед каждой записью перечисляет все файлы каталога,
+чтобы решить, пора ли вытеснять записи: при десятках тысяч файлов это
+дороже самой записи. CullingFileBasedCache делает это лишь на каждой
+``CULL_EVERY``-й записи — каталог ненадолго может превысить
+MAX_ENTRIES. PersistentFileBasedCache записи не вытесняет вовсе: в нём
+хранится состояние, которое не должно пропадать (blog.state).
+"""
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class CullingFileBasedCache(FileBasedCache):
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_every = int(
+            params.get('OPTIONS', {}).get('CULL_EVERY', 100)
+        )
+        self._sets_since_cull = 0
+
+    def _cull(self):
+        self._sets_since_cull += 1
+        if self._sets_since_cull < self._cull_every:
+            return
+        self._sets_since_cull = 0
+        super()._cull()
+
+
+class PersistentFileBasedCache(FileBasedCache):
+
+    def _cull(self):
+        pass
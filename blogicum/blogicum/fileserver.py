@@ -0,0 +1,264 @@
+"""Раздача статики и медиафайлов без отдельного веб-сервера.
+
+FileServerMiddleware стоит в начале MIDDLEWARE и отвечает на запросы
+к STATIC_URL и MEDIA_URL до маршрутизации, сессий и шаблонов. Файл
+отдаётся через FileResponse: WSGI-сервер с ``wsgi.file_wrapper``
+(gunicorn, uWSGI) передаёт его через sendfile. Поддерживаются
+запросы диапазона (Range), условные запросы (ETag, Last-Modified)
+и заранее сжатые варианты ``.br``/``.gz`` для статики.
+
+Имена с хэшем содержимого — статика после collectstatic
+с CompressedManifestStaticFilesStorage и изображения в
+ContentAddressedStorage — кэшируются браузером «навсегда».
+"""
+import asyncio
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from blog.concurrency import enable_async_mode
+from blog.storage import split_name
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Хэш, который ManifestStaticFilesStorage вставляет в имя файла
+STATIC_HASH_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Сжатые варианты в порядке предпочтения: (расширение, кодировка)
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+COMPRESSIBLE = ('.css', '.js', '.svg', '.map', '.txt', '.json', '.xml')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем в имени и заранее сжатыми копиями ``.gz``/``.br``.
+
+    Пока collectstatic не запускали, ссылки ведут на исходные имена:
+    так шаблоны работают и без собранной статики.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        # Промежуточные имена прошлых проходов уже удалены: сжимаем
+        # исходные файлы и окончательные имена из манифеста
+        for name, hashed_name in self.hashed_files.items():
+            for stored in (name, hashed_name):
+                if stored.endswith(COMPRESSIBLE) and self.exists(stored):
+                    self.compress(stored)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for extension, compressed in variants:
+            # Сжатие, которое не экономит, только добавляет работы клиенту
+            if len(compressed) < len(data):
+                with open(path + extension, 'wb') as target:
+                    target.write(compressed)
+
+
+class RangeFile:
+    """Часть файла [start, start + length) для ответа 206."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(начало, длина) для одиночного диапазона; None — отдать весь файл.
+
+    Для неудовлетворимого диапазона возвращает (size, 0).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = min(int(last), size)
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return size, 0
+    return start, end - start + 1
+
+
+class FileServerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_SERVE_FILES', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        enable_async_mode(self)
+        self.roots = [
+            (settings.STATIC_URL, settings.STATIC_ROOT, self.find_static),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT, None),
+        ]
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        path = self.requested_file(request)
+        if path is not None:
+            return self.serve(request, path)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # stat() и open() не ходят по сети: их можно вызвать прямо
+        # в цикле событий, а чтение файла ASGI-обработчик выполняет сам
+        path = self.requested_file(request)
+        if path is not None:
+            return self.serve(request, path)
+        return await self.get_response(request)
+
+    def requested_file(self, request):
+        if request.method in ('GET', 'HEAD'):
+            return self.find_file(request.path_info)
+        return None
+
+    @staticmethod
+    def find_static(name):
+        # Без collectstatic (при разработке) ищем файл в приложениях
+        if settings.DEBUG:
+            return finders.find(name)
+        return None
+
+    def find_file(self, url_path):
+        for url, root, fallback in self.roots:
+            if not url or not url_path.startswith(url):
+                continue
+            name = posixpath.normpath(unquote(url_path[len(url):]))
+            parts = name.split('/')
+            # Скрытые файлы и каталоги (например, .incoming с
+            # недозагруженными файлами) и выход за пределы корня
+            if any(part.startswith('.') for part in parts):
+                return None
+            if root:
+                path = os.path.join(root, *parts)
+                if os.path.isfile(path):
+                    return path
+            return fallback(name) if fallback else None
+        return None
+
+    def serve(self, request, path):
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=int(stat.st_mtime)
+        )
+        if not_modified is not None:
+            return self.add_headers(not_modified, path, etag, stat)
+
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and self.range_applies(
+                request, etag, stat):
+            byte_range = parse_range(request.META['HTTP_RANGE'], stat.st_size)
+        if byte_range is not None:
+            response = self.partial(path, stat.st_size, *byte_range)
+        else:
+            encoding, served_path = self.pick_encoding(request, path)
+            response = FileResponse(
+                open(served_path, 'rb'), content_type=content_type,
+                filename=os.path.basename(path),
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        if response.status_code != 416:
+            response['Content-Type'] = content_type
+        return self.add_headers(response, path, etag, stat)
+
+    @staticmethod
+    def range_applies(request, etag, stat):
+        # If-Range: диапазон только для той же версии файла
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag
+        return parse_http_date_safe(if_range) == int(stat.st_mtime)
+
+    @staticmethod
+    def partial(path, size, start, length):
+        if not length:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        response = FileResponse(
+            RangeFile(open(path, 'rb'), start, length), status=206
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{size}'
+        )
+        return response
+
+    @staticmethod
+    def pick_encoding(request, path):
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for extension, encoding in ENCODINGS:
+            if encoding in accepted and os.path.isfile(path + extension):
+                return encoding, path + extension
+        return None, path
+
+    @staticmethod
+    def is_immutable(path):
+        name = os.path.basename(path)
+        digest, _ = split_name(name)
+        return bool(digest or STATIC_HASH_RE.search(name))
+
+    def add_headers(self, response, path, etag, stat):
+        response['ETag'] = etag
+        response['Last-Modified'] = formatdate(stat.st_mtime, usegmt=True)
+        response['Accept-Ranges'] = 'bytes'
+        response['Vary'] = 'Accept-Encoding'
+        if self.is_immutable(path):
+            response['Cache-Control'] = IMMUTABLE
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.BLOG_FILES_MAX_AGE}'
+            )
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blogicum.fileserver.FileServerMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
+    'blog.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,13 +81,32 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# blogicum.sqlite — SQLite с WAL и PRAGMA для параллельной работы;
+# PRAGMAS дополняет и переопределяет DEFAULT_PRAGMAS из
+# blogicum/sqlite/base.py. Соединения живут CONN_MAX_AGE секунд
+# и проверяются в начале каждого запроса
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'HEALTH_CHECKS': True,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'PRAGMAS': {},
     }
 }
 
+# Чтение лент и страниц — с реплик (псевдонимы из DATABASES), запись —
+# в default (blog.routers). После записи пользователь читает из
+# default ещё BLOG_REPLICA_PIN_SECONDS секунд. Реплика SQLite — копия
+# файла базы, например:
+#     DATABASES['replica'] = {**DATABASES['default'],
+#                             'NAME': BASE_DIR / 'replica.sqlite3'}
+#     BLOG_READ_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+BLOG_READ_REPLICAS = []
+BLOG_REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -125,9 +148,103 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+STATIC_ROOT = BASE_DIR.parent / 'staticfiles'
+# collectstatic добавляет хэш в имена и сохраняет сжатые копии
+STATICFILES_STORAGE = (
+    'blogicum.fileserver.CompressedManifestStaticFilesStorage'
+)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR.parent / 'media'
 
+# Статику и медиафайлы отдаёт FileServerMiddleware (blogicum.fileserver);
+# False — оставить это внешнему веб-серверу. Файлы без хэша в имени
+# кэшируются на BLOG_FILES_MAX_AGE секунд
+BLOG_SERVE_FILES = True
+BLOG_FILES_MAX_AGE = 60
+
+# Пагинация лент: 'offset' — по номеру страницы (?page=),
+# 'keyset' — по курсору (?cursor=), без COUNT(*) и OFFSET
+BLOG_PAGINATION = 'offset'
+
+# Кэши обязаны быть общими для всех процессов: кэшированные страницы
+# и карточки сбрасываются только сменой версий (blog.caching), а версии
+# меняют и веб-воркеры, и run_tasks, promote_posts, import_blog.
+# У LocMemCache своя память в каждом процессе — их изменения другие
+# процессы не увидят. Кроме файлового кэша подойдут DatabaseCache, Redis
+# или Memcached; проверка blog.W001 предупреждает о кэше в памяти
+# процесса. 'default' хранит страницы, карточки и счётчики и вытесняет
+# лишнее (blogicum.cache), 'state' — версии и даты публикаций (blog.state)
+# и не вытесняет ничего
+CACHES = {
+    'default': {
+        'BACKEND': 'blogicum.cache.CullingFileBasedCache',
+        'LOCATION': BASE_DIR.parent / 'cache' / 'pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_EVERY': 1000,
+        },
+    },
+    'state': {
+        'BACKEND': 'blogicum.cache.PersistentFileBasedCache',
+        'LOCATION': BASE_DIR.parent / 'cache' / 'state',
+    },
+}
+
+# Сколько секунд хранить страницы лент для анонимных пользователей
+# (0 — не кэшировать); сбрасываются сигналами при изменениях
+BLOG_FEED_CACHE_TIMEOUT = 60 * 5
+# Cache-Control: max-age для анонимных лент; в обоих случаях срок
+# не выходит за момент ближайшей отложенной публикации
+BLOG_FEED_MAX_AGE = 60
+# Сколько хранить дату ближайшей отложенной публикации: после записей
+# в обход сигналов (update(), правка базы) она пересчитается не позже
+BLOG_NEXT_PUBLICATION_TIMEOUT = 60 * 10
+# Сколько хранить отрисованные карточки публикаций; после изменения
+# публикации, автора, категории или места карточка перерисовывается
+BLOG_CARD_CACHE_TIMEOUT = 60 * 60
+# Ленты больше порога показывают число публикаций по счётчику в кэше
+# (его ведут сигналы), а не по COUNT(*) на каждый запрос
+BLOG_EXACT_COUNT_THRESHOLD = 10000
+BLOG_FEED_COUNT_TIMEOUT = 24 * 60 * 60
+
+# Наибольшее число SQL-запросов на страницу (blog.middleware) по имени
+# маршрута; True — превышение бюджета считается ошибкой (для тестов)
+BLOG_QUERY_BUDGETS = {
+    'blog:index': 8,
+    'blog:category_posts': 9,
+    'blog:profile': 9,
+    'blog:post_detail': 9,
+    'blog:post_comments': 8,
+    'blog:search': 9,
+}
+BLOG_QUERY_BUDGET_STRICT = False
+
+# Бэкенд полнотекстового поиска (см. blog.search) и максимум
+# результатов, которые выдаёт страница поиска
+BLOG_SEARCH_BACKEND = 'blog.search.SQLiteFTS5Backend'
+BLOG_SEARCH_MAX_RESULTS = 200
+
+# Ширины уменьшенных копий изображений публикаций (WebP и JPEG)
+BLOG_IMAGE_RENDITION_WIDTHS = (320, 640, 960)
+
+# Ограничения на загружаемые изображения публикаций (blog.uploads):
+# размер файла в байтах и наибольшая сторона в пикселях
+BLOG_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+BLOG_UPLOAD_MAX_DIMENSION = 8000
+
+# Фоновые задачи (blog.tasks) выполняет `manage.py run_tasks`;
+# True — выполнять сразу после коммита в процессе веб-сервера
+BLOG_TASKS_EAGER = False
+# Задача, которая выполняется дольше (в секундах), считается брошенной
+# (воркер упал или был убит) и возвращается в очередь; после стольких
+# попыток она помечается ошибкой
+BLOG_TASK_TIMEOUT = 30 * 60
+BLOG_TASK_MAX_ATTEMPTS = 3
+
+# Асинхронные страницы чтения (blog.concurrency) — только под ASGI:
+# blogicum.asgi выставляет BLOG_ASYNC_VIEWS=1, под WSGI они медленнее
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
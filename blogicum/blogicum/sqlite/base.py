@@ -0,0 +1,94 @@
+"""SQLite, настроенный для работы под нагрузкой.
+
+Подключается как ``'ENGINE': 'blogicum.sqlite'``. Дополнительные
+ключи записи в DATABASES:
+
+``PRAGMAS``
+    PRAGMA, выполняемые на каждом новом соединении, поверх
+    DEFAULT_PRAGMAS. WAL позволяет читать ленты, пока другой запрос
+    пишет комментарий; ``busy_timeout`` — ждать блокировку,
+    а не сразу падать с «database is locked».
+``TRANSACTION_MODE``
+    ``'IMMEDIATE'`` — transaction.atomic() сразу берёт блокировку
+    записи. Иначе транзакция, которая сначала читает, а потом пишет,
+    при параллельной записи получает SQLITE_BUSY без всякого ожидания.
+``HEALTH_CHECKS``
+    При постоянных соединениях (CONN_MAX_AGE) перед первым запросом
+    в каждом HTTP-запросе проверять, что соединение живо и файл базы
+    не подменили (например, восстановлением из копии).
+"""
+import os
+
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # В режиме WAL NORMAL не теряет целостность, только последние
+    # транзакции при отключении питания
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+    # Отрицательное значение — в килобайтах
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.file_id = None
+
+    @property
+    def pragmas(self):
+        return {**DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        self.file_id = self.get_file_id()
+        # Новое соединение проверять незачем
+        self.health_check_done = True
+        return connection
+
+    def get_file_id(self):
+        if self.is_in_memory_db():
+            return None
+        try:
+            stat = os.stat(self.settings_dict['NAME'])
+        except (OSError, TypeError, ValueError):
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return self.file_id is None or self.get_file_id() == self.file_id
+
+    def _start_transaction_under_autocommit(self):
+        mode = (self.settings_dict.get('TRANSACTION_MODE') or '').upper()
+        mode = mode or 'DEFERRED'
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f'Неизвестный TRANSACTION_MODE: {mode}')
+        self.cursor().execute(f'BEGIN {mode}')
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается в начале и в конце каждого HTTP-запроса
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done
+                and self.settings_dict.get('HEALTH_CHECKS')
+                and not self.in_atomic_block
+                and not self.is_in_memory_db()):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
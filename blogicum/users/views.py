@@ -3,7 +3,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from blog.models import Post
-from django.core.paginator import Paginator
+from blog.paginators import paginate_posts
 
 User = get_user_model()
 
@@ -20,9 +20,8 @@ def register(request):
 
 def profile(request, username):
     user_obj = get_object_or_404(User, username=username)
-    all_posts = Post.objects.filter(author=user_obj).order_by('-pub_date')
-    paginator = Paginator(all_posts, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    all_posts = Post.objects.filter(author=user_obj).for_feed()
+    page_obj = paginate_posts(request, all_posts)
 
     return render(request, 'blog/profile.html', {
         'profile_user': user_obj,
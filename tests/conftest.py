@@ -19,16 +19,24 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
+# Ленты публикаций: главная, категория и профиль автора
+FEED_URLS = {
+    'index': '/',
+    'category': '/category/{category.slug}/',
+    'profile': '/profile/{user.username}/',
+}
 
 KeyVal = NamedTuple("KeyVal", [("key", Optional[str]), ("val", Optional[str])])
 UrlRepr = NamedTuple("UrlRepr", [("url", str), ("repr", str)])
@@ -41,6 +49,49 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    settings.BLOG_QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(settings, tmp_path):
+    # Пустые кэши в каталоге теста, а не общий каталог проекта
+    settings.CACHES = {
+        alias: {**config, 'LOCATION': tmp_path / 'cache' / alias}
+        for alias, config in settings.CACHES.items()
+    }
+
+
+def feed_url(name, user, category):
+    return FEED_URLS[name].format(user=user, category=category)
+
+
+@pytest.fixture
+def feed_urls(user, published_category):
+    return [feed_url(name, user, published_category) for name in FEED_URLS]
+
+
+def capture_queries(client, url, data=None):
+    """Ответ на GET-запрос и SQL-запросы, выполненные при его обработке."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, data)
+    assert response.status_code == HTTPStatus.OK
+    return response, queries.captured_queries
+
+
+def count_queries(client, url):
+    _, queries = capture_queries(client, url)
+    return len(queries)
+
+
+def run_queued_tasks():
+    """Выполнить задачи фоновой очереди (blog.tasks), как run_tasks."""
+    from blog.tasks import claim_tasks, run_task
+
+    return [run_task(task_id) for task_id in claim_tasks(100)]
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
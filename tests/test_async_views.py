@@ -0,0 +1,69 @@
+import asyncio
+import json
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import AsyncClient
+
+from django.urls import resolve
+
+from blog import views
+from blog.concurrency import async_views
+
+
+@pytest.mark.parametrize('view', [
+    views.index, views.category_posts, views.post_detail, views.profile,
+])
+def test_read_views_are_async(view):
+    assert asyncio.iscoroutinefunction(view.as_async), (
+        f'Убедитесь, что у `{view.__name__}` есть асинхронный вариант.'
+    )
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_async_views_routed_by_setting(enabled):
+    with async_views(enabled):
+        view = resolve('/').func
+        assert asyncio.iscoroutinefunction(view) == enabled, (
+            'Убедитесь, что асинхронные view подключаются к маршрутам '
+            'только при BLOG_ASYNC_VIEWS.'
+        )
+    assert not asyncio.iscoroutinefunction(resolve('/').func)
+
+
+@pytest.mark.parametrize('view', [
+    views.post_create, views.post_edit, views.add_comment,
+])
+def test_write_views_stay_sync(view):
+    assert not asyncio.iscoroutinefunction(view)
+
+
+@pytest.mark.django_db
+def test_async_middleware_chain():
+    response = async_to_sync(AsyncClient().get)('/pages/about/')
+    assert response.status_code == 200
+    assert 'queries' in response['Server-Timing'], (
+        'Убедитесь, что QueryBudgetMiddleware работает и под ASGI.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_handlers(tmp_path, settings):
+    settings.BLOG_QUERY_BUDGET_STRICT = False
+    call_command(
+        'seed_bench', users=3, posts=20, comments=30, categories=2,
+        locations=1, stdout=StringIO(),
+    )
+    output = tmp_path / 'handlers.json'
+    call_command(
+        'bench_handlers', requests=12, concurrency=4, no_page_cache=True,
+        output=str(output), stdout=StringIO(),
+    )
+    report = json.loads(output.read_text(encoding='utf-8'))
+    for interface in ('wsgi', 'asgi'):
+        assert report[interface]['status'] == {'200': 12}, (
+            f'Убедитесь, что страницы чтения отвечают через {interface}.'
+        )
+        assert report[interface]['rps'] > 0
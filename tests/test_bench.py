@@ -0,0 +1,70 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F
+
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def seeded():
+    call_command(
+        'seed_bench', users=5, posts=40, comments=100, categories=3,
+        locations=2, batch_size=15, stdout=StringIO(),
+    )
+
+
+def test_seed_bench_fills_database(seeded):
+    assert Post.objects.count() == 40
+    assert Comment.objects.count() == 100
+    assert Category.objects.count() == 3
+    mismatched = Post.objects.annotate(
+        actual=Count('comments')
+    ).exclude(comment_count=F('actual'))
+    assert not mismatched.exists(), (
+        'Убедитесь, что после заполнения базы счётчики комментариев '
+        'пересчитаны.'
+    )
+
+    call_command(
+        'seed_bench', users=1, posts=5, comments=0, categories=1,
+        locations=1, prefix='more', stdout=StringIO(),
+    )
+    assert Post.objects.count() == 45, (
+        'Убедитесь, что повторный запуск seed_bench добавляет данные '
+        'к уже существующим.'
+    )
+
+
+def test_run_bench_writes_report(seeded, tmp_path, settings):
+    # Синтетические данные не подогнаны под бюджеты запросов
+    settings.BLOG_QUERY_BUDGET_STRICT = False
+    output = tmp_path / 'bench.json'
+    call_command(
+        'run_bench', requests=3, warmup=1, output=str(output),
+        stdout=StringIO(), stderr=StringIO(),
+    )
+    report = json.loads(output.read_text(encoding='utf-8'))
+    urls = report['urls']
+    for name in ('blog:index', 'blog:post_detail', 'blog:search',
+                 'pages:about', 'users:profile'):
+        assert name in urls, (
+            f'Убедитесь, что run_bench замеряет маршрут `{name}`.'
+        )
+    index = urls['blog:index']
+    assert index['requests'] == 3
+    assert index['status'] == {'200': 3}
+    assert index['p50_ms'] <= index['p95_ms'] <= index['p99_ms']
+    assert index['queries'] > 0
+
+    compared = tmp_path / 'compared.json'
+    call_command(
+        'run_bench', requests=1, warmup=0, compare=str(output),
+        output=str(compared), stdout=StringIO(),
+        stderr=StringIO(),
+    )
+    assert compared.exists()
@@ -0,0 +1,114 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend('blog.Comment', post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что `Post.comment_count` растёт при добавлении '
+        'комментариев.'
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что `Post.comment_count` уменьшается при удалении '
+        'комментариев.'
+    )
+
+
+def test_stale_post_save_keeps_comment_count(
+        mixer, post_with_published_location
+):
+    stale_post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=stale_post)
+    stale_post.title = 'Новый заголовок'
+    stale_post.save()
+    stale_post.refresh_from_db()
+    assert stale_post.comment_count == 2
+
+
+def test_recount_comments_repairs_counts(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(4).blend('blog.Comment', post=post)
+    type(post).objects.update(comment_count=0)
+
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.comment_count == 4
+
+
+@pytest.mark.parametrize('n_comments', [2, 20])
+def test_post_deletion_skips_comment_counters(
+        django_assert_max_num_queries, mixer, user, published_category,
+        n_comments
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category
+    )
+    mixer.cycle(n_comments).blend('blog.Comment', post=post, author=user)
+    other = mixer.blend('blog.Post', author=user, category=published_category)
+    comment = mixer.blend('blog.Comment', post=other, author=user)
+    # Число запросов не зависит от числа комментариев
+    with django_assert_max_num_queries(10):
+        post.delete()
+
+    comment.delete()
+    other.refresh_from_db()
+    assert other.comment_count == 0, (
+        'Убедитесь, что удаление отдельного комментария по-прежнему '
+        'уменьшает счётчик.'
+    )
+
+
+def test_failed_post_deletion_keeps_counting(
+        mixer, user, post_with_published_location
+):
+    from django.db import transaction
+    from django.db.models.signals import post_delete
+
+    from blog.models import Comment
+
+    post = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+
+    def fail(**kwargs):
+        raise RuntimeError('Удаление прервано')
+
+    # Ошибка посреди каскада, после удаления комментариев
+    post_delete.connect(fail, sender=Comment)
+    try:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            post.delete()
+    finally:
+        post_delete.disconnect(fail, sender=Comment)
+
+    comment.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        'Убедитесь, что после неудачного удаления публикации счётчик её '
+        'комментариев по-прежнему обновляется.'
+    )
+
+
+def test_bulk_post_deletion_skips_comment_counters(
+        django_assert_max_num_queries, mixer, user, published_category
+):
+    from blog.models import Post
+
+    posts = mixer.cycle(2).blend(
+        'blog.Post', author=user, category=published_category
+    )
+    for post in posts:
+        mixer.cycle(10).blend('blog.Comment', post=post, author=user)
+    with django_assert_max_num_queries(15):
+        Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
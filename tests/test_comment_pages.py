@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    from blog.paginators import COMMENTS_PER_PAGE
+
+    return mixer.cycle(COMMENTS_PER_PAGE + 5).blend(
+        'blog.Comment', post=post_with_published_location
+    )
+
+
+def test_detail_inlines_first_comment_page(client, many_comments):
+    from blog.paginators import COMMENTS_PER_PAGE
+
+    post_id = many_comments[0].post_id
+    comments = client.get(f'/posts/{post_id}/').context['comments']
+    assert len(comments) == COMMENTS_PER_PAGE, (
+        'Убедитесь, что на странице публикации выводится только первая '
+        'страница комментариев.'
+    )
+    assert comments.has_next()
+
+
+def test_fragment_returns_rest_of_comments(client, many_comments):
+    post_id = many_comments[0].post_id
+    first_page = client.get(f'/posts/{post_id}/').context['comments']
+    response = client.get(
+        f'/posts/{post_id}/comments/', {'cursor': first_page.next_cursor}
+    )
+    assert response.status_code == 200
+    rest = response.context['comments']
+    seen_ids = [c.id for c in first_page] + [c.id for c in rest]
+    assert seen_ids == [c.id for c in many_comments], (
+        'Убедитесь, что фрагмент возвращает оставшиеся комментарии '
+        'в порядке добавления.'
+    )
+    assert not rest.has_next()
+    assert '<html' not in response.content.decode('utf-8')
+
+
+def test_fragment_hides_comments_of_unpublished_post(
+        client, mixer, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    response = client.get(f'/posts/{post.id}/comments/')
+    assert response.status_code == 404
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def urls(user, published_category, post_with_published_location):
+    return [
+        '/',
+        f'/category/{published_category.slug}/',
+        f'/profile/{user.username}/',
+        f'/posts/{post_with_published_location.id}/',
+    ]
+
+
+@pytest.mark.parametrize('client_name', ['unlogged_client', 'user_client'])
+def test_not_modified_without_rendering(request, urls, client_name):
+    client = request.getfixturevalue(client_name)
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Убедитесь, что {url} отвечает 304 на совпадающий ETag.'
+        )
+        # Допустим лишь поиск самого объекта страницы (публикации,
+        # категории, автора) — без лент и комментариев
+        blog_queries = [
+            query['sql'] for query in queries if 'blog_' in query['sql']
+        ]
+        assert len(blog_queries) <= 1 and not any(
+            'ORDER BY' in sql for sql in blog_queries
+        ), f'Убедитесь, что ответ 304 для {url} не читает публикации.'
+
+
+def test_last_modified_validator(unlogged_client, urls):
+    response = unlogged_client.get(urls[0])
+    response = unlogged_client.get(
+        urls[0], HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_last_modified_follows_next_publication(
+        mixer, user, unlogged_client, user_client, urls, published_category
+):
+    pub_date = timezone.now() + timedelta(days=1)
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=pub_date,
+    )
+    response = unlogged_client.get(urls[0])
+    assert response['Last-Modified'] == http_date(int(pub_date.timestamp())), (
+        'Убедитесь, что Last-Modified учитывает дату ближайшей '
+        'отложенной публикации.'
+    )
+    assert not user_client.get(urls[0]).has_header('Last-Modified'), (
+        'Убедитесь, что страницы вошедших пользователей отдаются без '
+        'Last-Modified.'
+    )
+
+
+def test_comment_changes_etag(
+        mixer, unlogged_client, urls, post_with_published_location
+):
+    etags = {url: unlogged_client.get(url)['ETag'] for url in urls}
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    for url in urls:
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.OK, (
+            f'Убедитесь, что новый комментарий меняет ETag страницы {url}.'
+        )
+
+
+def test_etag_differs_between_users(user_client, unlogged_client, urls):
+    assert user_client.get(urls[0])['ETag'] != (
+        unlogged_client.get(urls[0])['ETag']
+    )
+
+
+def test_missing_pages_not_validated(
+        mixer, user, another_user_client, published_category
+):
+    draft = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False,
+    )
+    future = http_date((timezone.now() + timedelta(days=1)).timestamp())
+    for url in (
+        '/posts/999999/', f'/posts/{draft.pk}/', '/category/nope/',
+        '/profile/ghost/',
+    ):
+        response = another_user_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=future
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Убедитесь, что {url} отвечает 404, а не 304, даже с '
+            'заголовком If-Modified-Since.'
+        )
+
+
+def test_new_csrf_token_changes_etag(
+        user_client, post_with_published_location
+):
+    from django.conf import settings
+    from django.utils.crypto import get_random_string
+
+    url = f'/posts/{post_with_published_location.id}/'
+    response = user_client.get(url)
+    assert settings.CSRF_COOKIE_NAME in response.cookies
+    etag = response['ETag']
+    assert user_client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+
+    # Новый вход меняет токен (rotate_token), форма со старым даст 403
+    user_client.cookies[settings.CSRF_COOKIE_NAME] = get_random_string(64)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что страница с формой отрисовывается заново, когда '
+        'у пользователя сменился CSRF-токен.'
+    )
@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import capture_queries, run_queued_tasks
+
+pytestmark = [pytest.mark.django_db]
+
+
+def feed_count(client, url):
+    """Число публикаций в пагинаторе и было ли выполнено COUNT(*)."""
+    response, queries = capture_queries(client, url)
+    counted = any('COUNT(*)' in query['sql'] for query in queries)
+    return response.context['page_obj'].paginator.count, counted
+
+
+@pytest.fixture
+def estimated(settings):
+    settings.BLOG_EXACT_COUNT_THRESHOLD = 0
+
+
+def test_counts_follow_signals(
+        estimated, mixer, user, another_user_client, published_category,
+        feed_urls
+):
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    for url in feed_urls:
+        assert feed_count(another_user_client, url) == (3, True)
+        assert feed_count(another_user_client, url) == (3, False), (
+            f'Убедитесь, что число публикаций для {url} берётся из кэша.'
+        )
+
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    posts[0].is_published = False
+    posts[0].save()
+    posts[1].delete()
+    for url in feed_urls:
+        assert feed_count(another_user_client, url) == (2, False), (
+            'Убедитесь, что сигналы поддерживают счётчик публикаций.'
+        )
+
+
+def test_post_moved_between_categories(
+        estimated, mixer, user, another_user_client, published_category,
+        another_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    old_url = f'/category/{published_category.slug}/'
+    new_url = f'/category/{another_category.slug}/'
+    feed_count(another_user_client, old_url)
+    feed_count(another_user_client, new_url)
+
+    post.category = another_category
+    post.save()
+    assert feed_count(another_user_client, old_url) == (0, False)
+    assert feed_count(another_user_client, new_url) == (1, False)
+
+
+def test_category_change_resets_counts(
+        estimated, mixer, user, another_user_client, published_category
+):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    feed_count(another_user_client, '/')
+    published_category.is_published = False
+    published_category.save()
+    run_queued_tasks()
+    assert feed_count(another_user_client, '/') == (0, True)
+
+
+def test_small_feeds_counted_exactly(
+        mixer, user, another_user_client, published_category
+):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    feed_count(another_user_client, '/')
+    assert feed_count(another_user_client, '/') == (1, True)
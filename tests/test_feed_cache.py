@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from conftest import count_queries
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_feed_served_from_cache(
+        unlogged_client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        count_queries(unlogged_client, url)
+        n_queries = count_queries(unlogged_client, url)
+        # Категорию и автора ищем и для страницы из кэша: её могли скрыть
+        expected = 0 if url == '/' else 1
+        assert n_queries == expected, (
+            f'Убедитесь, что повторный анонимный запрос {url} отдаётся '
+            'из кэша без чтения лент из базы.'
+        )
+
+
+def test_feeds_work_without_cache(
+        settings, unlogged_client, feed_urls, post_with_published_location
+):
+    settings.CACHES = {
+        alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        for alias in ('default', 'state')
+    }
+    # Бюджеты запросов рассчитаны на работающий кэш
+    settings.BLOG_QUERY_BUDGET_STRICT = False
+    for url in feed_urls:
+        assert unlogged_client.get(url).status_code == 200, (
+            f'Убедитесь, что страница {url} открывается, даже если кэш '
+            'не хранит версии.'
+        )
+
+
+def test_logged_in_feed_not_cached(user_client, post_with_published_location):
+    count_queries(user_client, '/')
+    n_queries = count_queries(user_client, '/')
+    assert n_queries > 0
+
+
+def test_comment_invalidates_feeds(
+        mixer, unlogged_client, feed_urls, post_with_published_location
+):
+    for url in feed_urls:
+        unlogged_client.get(url)
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    for url in feed_urls:
+        content = unlogged_client.get(url).content.decode('utf-8')
+        assert 'Комментарии (1)' in content, (
+            f'Убедитесь, что новый комментарий сбрасывает кэш {url}.'
+        )
+
+
+def test_login_keeps_profile_cache(user, client):
+    from blog.caching import author_scope, get_versions
+
+    scope = author_scope(user.username)
+    version = get_versions([scope])
+    client.force_login(user)
+    assert get_versions([scope]) == version, (
+        'Убедитесь, что вход автора на сайт не сбрасывает кэш его профиля.'
+    )
+    user.first_name = 'Новое имя'
+    user.save()
+    assert get_versions([scope]) != version
+
+
+def test_post_moved_to_another_category_invalidates_old_one(
+        unlogged_client, published_category, another_category,
+        post_with_published_location
+):
+    url = f'/category/{published_category.slug}/'
+    response = unlogged_client.get(url)
+    assert post_with_published_location.title in response.content.decode()
+
+    post_with_published_location.category = another_category
+    post_with_published_location.save()
+
+    response = unlogged_client.get(url)
+    assert post_with_published_location.title not in (
+        response.content.decode()
+    )
+
+
+def test_cache_expires_at_next_publication(
+        mixer, user, published_category, unlogged_client
+):
+    from blog import caching
+
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert caching.page_timeout() <= 31
+
+
+def test_state_cache_not_culled(settings, tmp_path):
+    from django.core.cache import caches
+
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'blogicum.cache.CullingFileBasedCache',
+            'LOCATION': tmp_path / 'pages',
+            'OPTIONS': {
+                'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 1, 'CULL_EVERY': 5,
+            },
+        },
+        'state': {
+            'BACKEND': 'blogicum.cache.PersistentFileBasedCache',
+            'LOCATION': tmp_path / 'state',
+            'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 1},
+        },
+    }
+    for n in range(4):
+        caches['default'].set(f'page:{n}', n)
+        caches['state'].set(f'version:{n}', n)
+    assert caches['default'].get_many(
+        [f'page:{n}' for n in range(4)]
+    ) == {f'page:{n}': n for n in range(4)}, (
+        'Убедитесь, что кэш страниц проверяет переполнение не при '
+        'каждой записи.'
+    )
+    caches['default'].set('page:4', 4)
+    assert caches['default'].get('page:0') is None
+    assert caches['state'].get_many(
+        [f'version:{n}' for n in range(4)]
+    ) == {f'version:{n}': n for n in range(4)}, (
+        'Убедитесь, что служебное состояние лент не вытесняется из кэша.'
+    )
@@ -0,0 +1,201 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from conftest import capture_queries, run_queued_tasks
+
+pytestmark = [pytest.mark.django_db]
+
+
+def entry_ids():
+    from blog.models import FeedEntry
+
+    return set(FeedEntry.objects.values_list('post_id', flat=True))
+
+
+def test_entries_follow_post_visibility(post_with_published_location):
+    post = post_with_published_location
+    assert entry_ids() == {post.pk}, (
+        'Убедитесь, что опубликованная публикация попадает в таблицу ленты.'
+    )
+
+    post.is_published = False
+    post.save()
+    assert entry_ids() == set(), (
+        'Убедитесь, что снятая с публикации запись удаляется из ленты.'
+    )
+
+    post.is_published = True
+    post.title = 'Снова в ленте'
+    post.save()
+    assert entry_ids() == {post.pk}
+
+    post.delete()
+    assert entry_ids() == set()
+
+
+def test_entry_copies_related_fields(post_with_published_location):
+    from blog.models import FeedEntry
+
+    post = post_with_published_location
+    post.category.title = 'Новое название'
+    post.category.save()
+    run_queued_tasks()
+    post.author.username = 'renamed'
+    post.author.save()
+    post.location.is_published = False
+    post.location.save()
+
+    entry = FeedEntry.objects.get(post=post)
+    assert entry.category_title == 'Новое название', (
+        'Убедитесь, что переименование категории обновляет записи ленты.'
+    )
+    assert entry.author_username == 'renamed'
+    assert entry.location is None, (
+        'Убедитесь, что снятое с публикации местоположение не показывается '
+        'в ленте.'
+    )
+
+
+def test_unpublished_category_removes_entries(
+        mixer, user, client, published_category
+):
+    posts = mixer.cycle(5).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    published_category.is_published = False
+    # Вместе с переименованием: записи ещё хранят старый slug
+    published_category.slug = 'renamed'
+    published_category.save()
+    # Записи удалит фоновая задача, а до тех пор их скрывает главная
+    assert entry_ids() == {post.pk for post in posts}
+    content = client.get('/').content.decode('utf-8')
+    assert not any(post.title in content for post in posts), (
+        'Убедитесь, что публикации скрытой категории не видны на главной, '
+        'пока их записи в ленте не удалены.'
+    )
+
+    assert run_queued_tasks() == ['done']
+    assert entry_ids() == set(), (
+        'Убедитесь, что публикации скрытой категории удаляются из ленты.'
+    )
+
+    published_category.is_published = True
+    published_category.save()
+    run_queued_tasks()
+    assert entry_ids() == {post.pk for post in posts}
+    content = client.get('/').content.decode('utf-8')
+    assert all(post.title in content for post in posts)
+
+
+def test_admin_reports_category_task(
+        admin_client, mixer, user, published_category
+):
+    from blog.models import Task
+
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    response = admin_client.post(
+        f'/admin/blog/category/{published_category.pk}/change/',
+        {
+            'title': published_category.title,
+            'description': published_category.description,
+            'slug': published_category.slug,
+            'is_published': '',
+        },
+        follow=True,
+    )
+    queued = Task.objects.get(name='sync_category_feed')
+    assert f'задача #{queued.pk}' in response.content.decode(), (
+        'Убедитесь, что админка сообщает номер фоновой задачи, '
+        'обновляющей ленту категории.'
+    )
+
+    run_queued_tasks()
+    response = admin_client.get('/admin/blog/task/')
+    assert response.status_code == 200
+    queued.refresh_from_db()
+    assert queued.finished_at >= queued.started_at
+
+
+def test_category_synced_in_batches(mixer, user, published_category):
+    from blog.caching import GLOBAL_SCOPE, get_versions
+    from blog.feed import sync_category_feed
+    from blog.models import Category
+
+    mixer.cycle(5).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    version, = get_versions([GLOBAL_SCOPE])
+    Category.objects.filter(pk=published_category.pk).update(
+        is_published=False
+    )
+    assert sync_category_feed(published_category.pk, batch_size=2) == 5
+    assert entry_ids() == set()
+    assert get_versions([GLOBAL_SCOPE]) != [version], (
+        'Убедитесь, что после обновления ленты категории сбрасывается '
+        'кэш страниц и счётчиков.'
+    )
+
+
+def test_due_post_promoted(mixer, user, published_category):
+    from blog.feed import promote_due_posts
+    from blog.models import Post
+
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(minutes=10),
+    )
+    assert entry_ids() == set(), (
+        'Убедитесь, что отложенная публикация не попадает в ленту раньше '
+        'времени.'
+    )
+
+    # Время публикации наступило без записи в базу
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert promote_due_posts() == 1
+    assert entry_ids() == {post.pk}, (
+        'Убедитесь, что отложенная публикация вносится в ленту, когда '
+        'наступает её время.'
+    )
+    assert promote_due_posts() == 0
+
+
+def test_comment_count_synced(mixer, user, post_with_published_location):
+    from blog.models import FeedEntry
+
+    post = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    assert FeedEntry.objects.get(post=post).comment_count == 1, (
+        'Убедитесь, что число комментариев в ленте обновляется.'
+    )
+    comment.delete()
+    assert FeedEntry.objects.get(post=post).comment_count == 0
+
+
+def test_index_reads_feed_table_only(client, post_with_published_location):
+    from blog.publication import refresh_next_publication
+
+    # Как после коммита, создавшего публикацию (blog.signals)
+    refresh_next_publication()
+    response, queries = capture_queries(client, '/')
+    assert post_with_published_location.title in response.content.decode()
+    feed_queries = [
+        query['sql'] for query in queries
+        if 'FROM "blog_feedentry"' in query['sql']
+        and 'ORDER BY' in query['sql']
+    ]
+    assert feed_queries and all(
+        'JOIN' not in sql for sql in feed_queries
+    ), (
+        'Убедитесь, что главная лента читается из таблицы ленты без JOIN.'
+    )
+    assert not any('FROM "blog_post"' in query['sql'] for query in queries
+                   if 'ORDER BY' in query['sql'])
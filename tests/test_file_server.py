@@ -0,0 +1,103 @@
+import gzip
+import os
+
+import pytest
+from django.core.management import call_command
+
+CSS = b'body { color: black; }\n' * 100
+
+
+@pytest.fixture
+def roots(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path / 'static'
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    css_dir = settings.STATIC_ROOT / 'css'
+    css_dir.mkdir(parents=True)
+    (css_dir / 'site.css').write_bytes(CSS)
+    (css_dir / 'site.css.gz').write_bytes(gzip.compress(CSS))
+    return settings.STATIC_ROOT, settings.MEDIA_ROOT
+
+
+def content(response):
+    return b''.join(response.streaming_content)
+
+
+def test_static_file_served(client, roots):
+    response = client.get('/static/css/site.css')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/css'
+    assert 'Content-Encoding' not in response
+    assert content(response) == CSS
+    assert response['Cache-Control'] == 'public, max-age=60'
+
+
+def test_precompressed_variant(client, roots):
+    response = client.get(
+        '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip, deflate'
+    )
+    assert response['Content-Encoding'] == 'gzip', (
+        'Убедитесь, что клиенту, принимающему gzip, отдаётся заранее '
+        'сжатый файл.'
+    )
+    assert response['Content-Type'] == 'text/css'
+    assert response['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(content(response)) == CSS
+
+
+def test_range_requests(client, roots):
+    response = client.get('/static/css/site.css', HTTP_RANGE='bytes=5-9')
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'bytes 5-9/{len(CSS)}'
+    assert response['Content-Length'] == '5'
+    assert content(response) == CSS[5:10]
+
+    response = client.get('/static/css/site.css', HTTP_RANGE='bytes=-4')
+    assert content(response) == CSS[-4:]
+
+    response = client.get(
+        '/static/css/site.css', HTTP_RANGE=f'bytes={len(CSS)}-'
+    )
+    assert response.status_code == 416
+
+
+def test_conditional_request(client, roots):
+    etag = client.get('/static/css/site.css')['ETag']
+    response = client.get('/static/css/site.css', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_media_served_immutable(client, roots):
+    _, media_root = roots
+    digest = 'a' * 64
+    image_dir = media_root / 'posts' / 'aa'
+    image_dir.mkdir(parents=True)
+    (image_dir / f'{digest}.png').write_bytes(b'png')
+    (image_dir / f'{digest}.w320.webp').write_bytes(b'webp')
+    incoming = media_root / '.incoming'
+    incoming.mkdir()
+    (incoming / 'partial.upload').write_bytes(b'secret')
+
+    for name in (f'{digest}.png', f'{digest}.w320.webp'):
+        response = client.get(f'/media/posts/aa/{name}')
+        assert response.status_code == 200
+        assert 'immutable' in response['Cache-Control'], (
+            'Убедитесь, что файлы с хэшем содержимого в имени отдаются '
+            'с заголовком Cache-Control: immutable.'
+        )
+    assert client.get('/media/.incoming/partial.upload').status_code == 404
+    assert client.get('/media/posts/../.incoming/partial.upload'
+                      ).status_code == 404
+
+
+def test_collectstatic_hashes_and_compresses(settings, tmp_path, client):
+    settings.STATIC_ROOT = tmp_path / 'collected'
+    call_command('collectstatic', interactive=False, verbosity=0)
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    hashed = staticfiles_storage.stored_name('blog/css/bootstrap.min.css')
+    assert hashed != 'blog/css/bootstrap.min.css'
+    assert os.path.exists(settings.STATIC_ROOT / f'{hashed}.gz')
+    response = client.get(f'/static/{hashed}')
+    assert response['Cache-Control'] == (
+        'public, max-age=31536000, immutable'
+    )
@@ -0,0 +1,103 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / 'db.json'
+
+
+def export(*args, **options):
+    call_command('export_blog', *args, stderr=StringIO(), **options)
+
+
+def load(path, **options):
+    call_command('import_blog', str(path), stdout=StringIO(), **options)
+
+
+@pytest.fixture
+def blog_data(mixer, user, published_category, published_location):
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+        location=published_location, is_published=True,
+    )
+    mixer.cycle(4).blend('blog.Comment', post=posts[0], author=user)
+    return posts
+
+
+def test_export_import_roundtrip(blog_data, tmp_path):
+    dump = tmp_path / 'blog.jsonl'
+    export(output=str(dump))
+    lines = dump.read_text(encoding='utf-8').splitlines()
+    assert all(json.loads(line)['model'] for line in lines), (
+        'Убедитесь, что export_blog пишет по одной записи JSON в строке.'
+    )
+    # JSON хранит время с точностью до миллисекунд, как и dumpdata
+    created_at = {
+        post.pk: post.created_at.replace(
+            microsecond=post.created_at.microsecond // 1000 * 1000
+        )
+        for post in Post.objects.all()
+    }
+
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    load(dump, skip_existing=True)
+
+    assert Post.objects.count() == 3
+    assert Comment.objects.count() == 4
+    assert Post.objects.get(pk=blog_data[0].pk).comment_count == 4, (
+        'Убедитесь, что после импорта счётчики комментариев пересчитаны.'
+    )
+    assert {
+        post.pk: post.created_at for post in Post.objects.all()
+    } == created_at, (
+        'Убедитесь, что импорт сохраняет исходное время добавления.'
+    )
+
+
+def test_import_conflicts_are_reported(blog_data, tmp_path):
+    dump = tmp_path / 'blog.jsonl'
+    export(output=str(dump))
+    with pytest.raises(CommandError):
+        load(dump)
+    assert Post.objects.count() == 3
+
+
+def test_incremental_export(blog_data, tmp_path, mixer, user):
+    watermark = tmp_path / 'watermark'
+    first, second = tmp_path / 'first.jsonl', tmp_path / 'second.jsonl'
+    export('blog.post', output=str(first), watermark=str(watermark))
+    assert len(first.read_text().splitlines()) == 3
+    assert watermark.exists()
+
+    new_post = mixer.blend('blog.Post', author=user)
+    Post.objects.filter(pk=new_post.pk).update(
+        created_at=timezone.now() + timedelta(seconds=1)
+    )
+    export('blog.post', output=str(second), watermark=str(watermark))
+    exported = [
+        json.loads(line)['pk'] for line in second.read_text().splitlines()
+    ]
+    assert exported == [new_post.pk], (
+        'Убедитесь, что выгрузка с --watermark содержит только строки, '
+        'добавленные после прошлой выгрузки.'
+    )
+
+
+def test_import_loaddata_fixture():
+    load(DB_JSON)
+    fixture = json.loads(DB_JSON.read_text(encoding='utf-8'))
+    for model in (Post, Category, Location):
+        label = model._meta.label_lower
+        assert model.objects.count() == sum(
+            record['model'] == label for record in fixture
+        ), f'Убедитесь, что import_blog загружает `{label}` из db.json.'
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE, capture_queries, feed_url
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def keyset_posts(mixer, user, published_category):
+    now = timezone.now()
+    # Пары публикаций с одинаковым временем проверяют сортировку по id
+    pub_dates = (
+        now - timedelta(hours=i // 2) for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=pub_dates,
+    )
+
+
+def walk_forward(client, url):
+    seen_pages = []
+    response = client.get(url)
+    while True:
+        page_obj = response.context['page_obj']
+        seen_pages.append(page_obj)
+        if not page_obj.has_next():
+            return seen_pages
+        response = client.get(url, {'cursor': page_obj.next_cursor})
+
+
+@pytest.mark.parametrize('url_name', ['index', 'category', 'profile'])
+def test_keyset_walks_whole_feed(
+        settings, client, user, published_category, keyset_posts, url_name
+):
+    settings.BLOG_PAGINATION = 'keyset'
+    url = feed_url(url_name, user, published_category)
+    pages = walk_forward(client, url)
+    seen_ids = [post.id for page in pages for post in page]
+    expected_ids = [
+        post.id for post in sorted(
+            keyset_posts, key=lambda p: (p.pub_date, p.id), reverse=True)
+    ]
+    assert seen_ids == expected_ids, (
+        'Убедитесь, что курсорная пагинация выводит все публикации '
+        'ровно по одному разу, «от новых к старым».'
+    )
+
+    last_page = pages[-1]
+    response = client.get(url, {'cursor': last_page.previous_cursor})
+    assert [p.id for p in response.context['page_obj']] == [
+        p.id for p in pages[-2]
+    ], 'Убедитесь, что ссылка «назад» возвращает предыдущую страницу.'
+
+
+def test_keyset_does_not_count(settings, client, keyset_posts):
+    settings.BLOG_PAGINATION = 'keyset'
+    first_page = client.get('/').context['page_obj']
+    _, queries = capture_queries(
+        client, '/', {'cursor': first_page.next_cursor}
+    )
+    sql = ' '.join(query['sql'].upper() for query in queries)
+    assert 'COUNT(*)' not in sql
+    assert 'OFFSET' not in sql
+
+
+def test_broken_cursor_falls_back_to_first_page(client, keyset_posts):
+    response = client.get('/', {'cursor': 'not-a-cursor'})
+    assert response.status_code == 200
+    assert len(response.context['page_obj']) == N_PER_PAGE
@@ -0,0 +1,111 @@
+import os
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def png(color=(10, 120, 200), size=(800, 400), name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def ref_count(name):
+    from blog.models import MediaFile
+
+    return MediaFile.objects.get(name=name).ref_count
+
+
+def collect_media(**options):
+    out = StringIO()
+    call_command('collect_media', stdout=out, **options)
+    return out.getvalue()
+
+
+@pytest.fixture
+def new_post(settings, tmp_path, mixer, user, published_category):
+    settings.MEDIA_ROOT = tmp_path
+
+    def create(image):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=None,
+        )
+        post.image = image
+        post.save()
+        return post
+
+    return create
+
+
+def test_identical_uploads_share_one_file(new_post):
+    first = new_post(png(name='first.png'))
+    second = new_post(png(name='second.PNG'))
+    assert first.image.name == second.image.name, (
+        'Убедитесь, что одинаковые изображения сохраняются одним файлом.'
+    )
+    directory, filename = os.path.split(first.image.path)
+    digest, extension = os.path.splitext(filename)
+    assert len(digest) == 64 and extension == '.png'
+    assert os.listdir(directory) == [filename]
+    assert ref_count(first.image.name) == 2
+
+    other = new_post(png(color=(200, 0, 0)))
+    assert other.image.name != first.image.name
+
+
+def test_references_follow_posts(new_post):
+    first = new_post(png())
+    second = new_post(png())
+    name = first.image.name
+
+    first.delete()
+    assert ref_count(name) == 1
+
+    second.image = png(color=(0, 0, 0))
+    second.save()
+    assert ref_count(name) == 0
+    assert ref_count(second.image.name) == 1
+
+
+def test_collect_media_removes_orphans(new_post):
+    from blog.images import generate_renditions
+    from blog.models import MediaFile
+
+    kept = new_post(png(color=(1, 2, 3)))
+    orphan = new_post(png())
+    storage = orphan.image.storage
+    generate_renditions(orphan.image)
+    name = orphan.image.name
+    derived = storage.derived_names(name)
+    assert derived
+    orphan.delete()
+
+    collect_media()
+    assert storage.exists(name), (
+        'Убедитесь, что collect_media не трогает недавно загруженные файлы.'
+    )
+
+    output = collect_media(grace_hours=0, dry_run=True)
+    assert name in output and storage.exists(name)
+
+    collect_media(grace_hours=0)
+    for file_name in [name] + derived:
+        assert not storage.exists(file_name)
+    assert not MediaFile.objects.filter(name=name).exists()
+    assert storage.exists(kept.image.name)
+
+
+def test_collect_media_recount(new_post):
+    from blog.models import MediaFile
+
+    post = new_post(png())
+    MediaFile.objects.all().delete()
+    collect_media(grace_hours=0, recount=True)
+    assert post.image.storage.exists(post.image.name)
+    assert ref_count(post.image.name) == 1
@@ -0,0 +1,34 @@
+from django.template.loader import render_to_string
+
+
+def render_page(number, count=1000):
+    from blog.paginators import FeedPaginator
+
+    page_obj = FeedPaginator(range(count * 10), 10).get_page(number)
+    return page_obj, render_to_string(
+        'includes/paginator.html', {'page_obj': page_obj}
+    )
+
+
+def test_page_links_do_not_grow_with_page_count():
+    _, small = render_page(50, count=100)
+    _, large = render_page(500, count=10000)
+    assert small.count('page-item') == large.count('page-item'), (
+        'Убедитесь, что число ссылок пагинатора не зависит от числа '
+        'страниц.'
+    )
+    assert large.count('page-item') < 20
+
+
+def test_window_around_current_page():
+    page_obj, html = render_page(500)
+    assert list(page_obj.elided_page_range) == [
+        1, '…', 498, 499, 500, 501, 502, '…', 1000
+    ]
+    assert 'page=1000' in html
+    assert '<span class="page-link">…</span>' in html
+
+
+def test_few_pages_listed_in_full():
+    page_obj, _ = render_page(2, count=5)
+    assert list(page_obj.elided_page_range) == [1, 2, 3, 4, 5]
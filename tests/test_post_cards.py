@@ -0,0 +1,66 @@
+import pytest
+
+from conftest import run_queued_tasks
+
+pytestmark = [pytest.mark.django_db]
+
+
+def feed(client):
+    # Вошедший пользователь: страница целиком не кэшируется,
+    # карточки — да
+    return client.get('/').content.decode('utf-8')
+
+
+def test_post_card_rendered_from_cache(
+        user_client, post_with_published_location
+):
+    from blog.models import Post
+
+    post = post_with_published_location
+    assert post.title in feed(user_client)
+    # Обход сигналов: версии не меняются, карточка берётся из кэша
+    Post.objects.filter(pk=post.pk).update(title='Тихая правка')
+    assert 'Тихая правка' not in feed(user_client), (
+        'Убедитесь, что карточки публикаций в ленте кэшируются.'
+    )
+
+    post.refresh_from_db()
+    post.title = 'Новый заголовок'
+    post.save()
+    assert 'Новый заголовок' in feed(user_client), (
+        'Убедитесь, что изменение публикации сбрасывает кэш её карточки.'
+    )
+
+
+def test_related_changes_invalidate_card(
+        mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    feed(user_client)
+
+    post.category.title = 'Переименованная категория'
+    post.category.save()
+    run_queued_tasks()
+    assert 'Переименованная категория' in feed(user_client)
+
+    post.location.name = 'Новое место'
+    post.location.save()
+    assert 'Новое место' in feed(user_client)
+
+    mixer.blend('blog.Comment', post=post)
+    assert 'Комментарии (1)' in feed(user_client)
+
+
+def test_search_snippet_not_cached(
+        user_client, post_with_published_location
+):
+    from blog.models import Post
+
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text='искомое слово')
+    post.refresh_from_db()
+    post.save()
+    feed(user_client)
+    content = user_client.get('/search/?q=искомое').content.decode('utf-8')
+    assert '<mark>искомое</mark>' in content
+
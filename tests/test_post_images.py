@@ -0,0 +1,137 @@
+from io import BytesIO
+
+import pytest
+from bs4 import BeautifulSoup
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from conftest import run_queued_tasks
+
+pytestmark = [pytest.mark.django_db]
+
+EXIF_ORIENTATION = 0x0112
+ROTATED_90_CW = 6
+
+
+def image_file(name, fmt='PNG', size=(1000, 500), exif=None):
+    buffer = BytesIO()
+    picture = Image.new('RGB', size, (10, 120, 200))
+    if exif is not None:
+        picture.save(buffer, fmt, exif=exif)
+    else:
+        picture.save(buffer, fmt)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+@pytest.fixture
+def upload_post_image(settings, tmp_path, mixer, user, published_category):
+    settings.MEDIA_ROOT = tmp_path
+
+    def upload(content):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=None,
+        )
+        post.image = content
+        post.save()
+        return post
+
+    return upload
+
+
+def test_uploaded_image_waits_for_worker(client, upload_post_image):
+    post = upload_post_image(image_file('waiting.png'))
+    assert post.image_status == post.IMAGE_PROCESSING
+    content = client.get('/').content.decode('utf-8')
+    assert 'image-processing.svg' in content, (
+        'Убедитесь, что пока изображение обрабатывается, в ленте '
+        'показывается заглушка.'
+    )
+
+    assert run_queued_tasks() == ['done']
+    post.refresh_from_db()
+    assert post.image_status == post.IMAGE_READY
+
+
+def test_renditions_saved_next_to_original(settings, upload_post_image):
+    from blog.images import renditions
+
+    post = upload_post_image(image_file('large.png'))
+    run_queued_tasks()
+    post.refresh_from_db()
+    image = post.image
+    assert post.image_width == 1000
+    for extension, copies in renditions(image).items():
+        assert [width for _, width in copies] == [
+            w for w in settings.BLOG_IMAGE_RENDITION_WIDTHS if w < 1000
+        ]
+        for name, width in copies:
+            with image.storage.open(name) as copy:
+                picture = Image.open(copy)
+                assert picture.width == width
+                assert picture.format == {
+                    'webp': 'WEBP', 'jpg': 'JPEG'}[extension]
+
+
+def test_feed_card_uses_srcset(client, upload_post_image):
+    post = upload_post_image(image_file('srcset.png'))
+    run_queued_tasks()
+    soup = BeautifulSoup(client.get('/').content, features='html.parser')
+    picture = soup.find('picture')
+    assert picture is not None, (
+        'Убедитесь, что карточка публикации выводит <picture> с копиями '
+        'изображения разных размеров.'
+    )
+    assert '.w320.webp 320w' in picture.find('source')['srcset']
+    img = picture.find('img')
+    assert '.w640.jpg 640w' in img['srcset']
+    post.refresh_from_db()
+    assert img['src'] == post.image.url
+
+
+def test_exif_orientation_applied_and_stripped(upload_post_image):
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = ROTATED_90_CW
+    post = upload_post_image(
+        image_file('rotated.jpg', 'JPEG', size=(400, 200), exif=exif)
+    )
+    run_queued_tasks()
+    post.refresh_from_db()
+    with post.image.open() as stored:
+        picture = Image.open(stored)
+        assert picture.size == (200, 400)
+        assert not picture.getexif()
+    assert post.image_width == 200
+
+
+def test_broken_upload_is_dropped(upload_post_image):
+    from blog.models import MediaFile
+
+    post = upload_post_image(ContentFile(b'not an image', name='broken.jpg'))
+    name = post.image.name
+    run_queued_tasks()
+    post.refresh_from_db()
+    assert not post.image
+    assert post.image_status == post.IMAGE_FAILED
+    assert MediaFile.objects.get(name=name).ref_count == 0
+
+
+def test_missing_original_not_opened(client, user, upload_post_image):
+    from blog.feed import rebuild_feed
+    from blog.models import Post
+
+    post = upload_post_image(image_file('uploaded.png'))
+    assert post.image_width == 1000, (
+        'Убедитесь, что ширина изображения записывается при загрузке.'
+    )
+    # Оригинал потерян, ширина неизвестна (см. миграцию 0011)
+    Post.objects.filter(pk=post.pk).update(
+        image='posts/missing.jpg', image_width=None,
+        image_status=Post.IMAGE_READY,
+    )
+    rebuild_feed()
+    for url in ('/', f'/profile/{user.username}/', f'/posts/{post.pk}/'):
+        assert client.get(url).status_code == 200, (
+            'Убедитесь, что страницы не открывают файл изображения '
+            'из хранилища.'
+        )
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(
+        mixer, user, published_category, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            is_published=True,
+            pub_date=timezone.now() + timedelta(minutes=10),
+        )
+
+
+def test_next_publication_is_cached(
+        django_assert_num_queries, scheduled_post
+):
+    from blog.publication import next_publication
+
+    with django_assert_num_queries(0):
+        assert next_publication() == scheduled_post.pub_date
+
+
+def test_next_publication_follows_post_saves(mixer, scheduled_post):
+    from blog.publication import next_publication
+
+    earlier = mixer.blend(
+        'blog.Post', author=scheduled_post.author,
+        category=scheduled_post.category, is_published=True,
+        pub_date=timezone.now() + timedelta(minutes=1),
+    )
+    assert next_publication() == earlier.pub_date
+
+    earlier.is_published = False
+    earlier.save()
+    assert next_publication() == scheduled_post.pub_date
+
+    scheduled_post.delete()
+    assert next_publication() is None
+
+
+def test_next_publication_refreshed_after_commit(
+        mixer, scheduled_post, django_capture_on_commit_callbacks
+):
+    from blog.publication import NEXT_PUBLICATION_KEY
+    from blog.state import state_cache
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        earlier = mixer.blend(
+            'blog.Post', author=scheduled_post.author,
+            category=scheduled_post.category, is_published=True,
+            pub_date=timezone.now() + timedelta(minutes=1),
+        )
+    assert state_cache.get(NEXT_PUBLICATION_KEY) is None, (
+        'Убедитесь, что до коммита в кэш не попадает дата из '
+        'незафиксированной транзакции.'
+    )
+    for callback in callbacks:
+        callback()
+    assert state_cache.get(NEXT_PUBLICATION_KEY) == earlier.pub_date, (
+        'Убедитесь, что дата ближайшей публикации пересчитывается после '
+        'коммита.'
+    )
+
+
+def test_passed_publication_is_recomputed(scheduled_post):
+    from blog.publication import NEXT_PUBLICATION_KEY, next_publication
+    from blog.state import state_cache
+
+    state_cache.set(
+        NEXT_PUBLICATION_KEY, timezone.now() - timedelta(seconds=1)
+    )
+    assert next_publication() == scheduled_post.pub_date
+
+
+def test_feed_max_age_capped_by_next_publication(
+        settings, unlogged_client, mixer, user, published_category
+):
+    settings.BLOG_FEED_MAX_AGE = 60 * 60
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    response = unlogged_client.get('/')
+    max_age = int(response['Cache-Control'].split('max-age=')[1])
+    assert 0 < max_age <= 31, (
+        'Убедитесь, что max-age ленты не превышает времени до ближайшей '
+        'отложенной публикации.'
+    )
@@ -0,0 +1,63 @@
+import json
+import logging
+
+import pytest
+from django.db import connection
+
+pytestmark = [pytest.mark.django_db]
+
+
+def logged_stats(caplog):
+    records = [r for r in caplog.records if r.name == 'blog.queries']
+    return json.loads(records[-1].getMessage())
+
+
+def test_server_timing_and_log(
+        caplog, user_client, many_posts_with_published_locations
+):
+    with caplog.at_level(logging.INFO, logger='blog.queries'):
+        response = user_client.get('/')
+    stats = logged_stats(caplog)
+    assert stats['view'] == 'blog:index'
+    assert stats['queries'] > 0
+    assert stats['duplicates'] == {}, (
+        'Убедитесь, что главная страница не выполняет повторяющихся '
+        'запросов.'
+    )
+    assert f'desc="{stats["queries"]} queries"' in response['Server-Timing']
+
+
+@pytest.mark.parametrize('url_name, url', [
+    ('blog:index', '/'),
+    ('blog:post_detail', '/posts/{post.id}/'),
+    ('blog:profile', '/profile/{post.author.username}/'),
+    ('blog:category_posts', '/category/{post.category.slug}/'),
+])
+def test_exceeded_budget_fails(
+        settings, user_client, post_with_published_location, url_name, url
+):
+    from blog.middleware import QueryBudgetExceeded
+
+    post = post_with_published_location
+    url = url.format(post=post)
+    user_client.get(url)
+    settings.BLOG_QUERY_BUDGETS = {url_name: 0}
+    with pytest.raises(QueryBudgetExceeded):
+        user_client.get(url)
+
+
+def test_duplicate_fingerprints():
+    from blog.middleware import QueryStats, fingerprint
+
+    assert fingerprint('SELECT 1 WHERE id IN (%s, %s)') == fingerprint(
+        'SELECT  1 WHERE id IN (%s, %s, %s)'
+    )
+    stats = QueryStats()
+    with connection.execute_wrapper(stats):
+        with connection.cursor() as cursor:
+            for value in range(3):
+                cursor.execute('SELECT %s', [value])
+            cursor.execute('SELECT 1')
+    assert stats.count == 4
+    (duplicate,) = stats.duplicates().values()
+    assert duplicate == {'count': 3, 'sql': 'SELECT %s'}
@@ -0,0 +1,55 @@
+import pytest
+
+from conftest import FEED_URLS, N_PER_PAGE, count_queries
+
+pytestmark = [pytest.mark.django_db]
+
+PROFILE_URLS = {
+    **FEED_URLS,
+    'users_profile': '/auth/profile/{user.username}/',
+}
+
+
+def blend_posts(mixer, user, category, count):
+    locations = mixer.cycle(count).blend('blog.Location', is_published=True)
+    return mixer.cycle(count).blend(
+        'blog.Post',
+        author=user,
+        is_published=True,
+        category=category,
+        location=(location for location in locations),
+    )
+
+
+@pytest.mark.parametrize('url_name', PROFILE_URLS)
+@pytest.mark.parametrize('client_name', ['unlogged_client', 'user_client'])
+def test_feed_query_count_does_not_grow(
+        request, mixer, user, published_category, url_name, client_name
+):
+    client = request.getfixturevalue(client_name)
+    url = PROFILE_URLS[url_name].format(
+        user=user, category=published_category
+    )
+
+    blend_posts(mixer, user, published_category, 1)
+    one_post_queries = count_queries(client, url)
+
+    blend_posts(mixer, user, published_category, N_PER_PAGE)
+    full_page_queries = count_queries(client, url)
+
+    assert full_page_queries == one_post_queries, (
+        f'Убедитесь, что число SQL-запросов страницы {url} не зависит от '
+        f'числа публикаций на ней: {one_post_queries} запросов для одной '
+        f'публикации и {full_page_queries} — для полной страницы.'
+    )
+
+
+def test_post_detail_query_count(
+        django_assert_max_num_queries, client, post_with_published_location
+):
+    from blog.publication import refresh_next_publication
+
+    # Как после коммита, создавшего публикацию (blog.signals)
+    refresh_next_publication()
+    with django_assert_max_num_queries(2):
+        client.get(f'/posts/{post_with_published_location.id}/')
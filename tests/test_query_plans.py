@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+
+from conftest import capture_queries, feed_url
+
+pytestmark = [pytest.mark.django_db]
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def main_query_plan(client, url, table):
+    _, queries = capture_queries(client, url)
+    main_queries = [
+        query['sql'] for query in queries
+        if f'FROM "{table}"' in query['sql'] and 'ORDER BY' in query['sql']
+    ]
+    assert main_queries, f'Не найден основной запрос страницы {url}.'
+    return explain(main_queries[0])
+
+
+def assert_indexed_without_sort(plan, url):
+    post_steps = [
+        step for step in plan
+        if any(table in step for table in (
+            'blog_post', 'blog_comment', 'blog_feedentry'
+        ))
+    ]
+    assert post_steps and all('INDEX' in step for step in post_steps), (
+        f'Убедитесь, что основной запрос страницы {url} использует индекс. '
+        f'План: {plan}'
+    )
+    assert not any('TEMP B-TREE' in step for step in plan), (
+        f'Убедитесь, что основной запрос страницы {url} не сортирует '
+        f'выборку во временном B-дереве. План: {plan}'
+    )
+
+
+@pytest.mark.parametrize('url_name', ['index', 'category', 'profile'])
+def test_feed_queries_use_index(
+        client, user, published_category, post_with_published_location,
+        url_name
+):
+    url = feed_url(url_name, user, published_category)
+    table = {
+        'index': 'blog_feedentry',
+        'category': 'blog_feedentry',
+        'profile': 'blog_post',
+    }[url_name]
+    plan = main_query_plan(client, url, table)
+    assert_indexed_without_sort(plan, url)
+
+
+def test_comment_listing_uses_index(client, comment_to_a_post):
+    url = f'/posts/{comment_to_a_post.post_id}/'
+    plan = main_query_plan(client, url, 'blog_comment')
+    assert_indexed_without_sort(plan, url)
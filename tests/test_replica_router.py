@@ -0,0 +1,90 @@
+import pytest
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog.models import Post
+from blog.routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, ReplicaPinMiddleware
+)
+
+router = PrimaryReplicaRouter()
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.BLOG_READ_REPLICAS = ['replica']
+    settings.BLOG_REPLICA_PIN_SECONDS = 10
+
+
+def call_middleware(cookies=None, write=False, method='post'):
+    """Пропустить запрос через ReplicaPinMiddleware.
+
+    Возвращает ответ и базу, выбранную для чтения внутри запроса.
+    """
+    chosen = {}
+
+    def view(request):
+        if write:
+            router.db_for_write(Post)
+        chosen['read'] = router.db_for_read(Post)
+        return HttpResponse()
+
+    request = getattr(RequestFactory(), method)('/')
+    request.COOKIES.update(cookies or {})
+    response = ReplicaPinMiddleware(view)(request)
+    return response, chosen['read']
+
+
+def test_single_database_not_routed():
+    assert router.db_for_read(Post) is None
+    assert router.db_for_write(Post) == 'default'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_go_to_replica(replicas):
+    assert router.db_for_read(Post) == 'replica'
+    with transaction.atomic():
+        assert router.db_for_read(Post) == 'default', (
+            'Убедитесь, что внутри транзакции чтение идёт '
+            'из основной базы.'
+        )
+    post = Post(title='x')
+    post._state.db = 'default'
+    assert router.db_for_read(Post, instance=post) == 'default'
+
+
+def test_write_pins_user_to_primary(replicas):
+    response, read = call_middleware()
+    assert read == 'replica'
+    assert PIN_COOKIE not in response.cookies
+
+    response, read = call_middleware(write=True)
+    assert read == 'default', (
+        'Убедитесь, что после записи чтение в том же запросе идёт '
+        'из основной базы.'
+    )
+    cookie = response.cookies[PIN_COOKIE]
+    assert cookie['max-age'] == 10
+
+    _, read = call_middleware(
+        cookies={PIN_COOKIE: cookie.value}, method='get'
+    )
+    assert read == 'default', (
+        'Убедитесь, что после записи пользователь какое-то время '
+        'читает из основной базы.'
+    )
+
+
+def test_no_pin_without_replicas():
+    response, read = call_middleware(write=True)
+    assert read is None
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_housekeeping_writes_do_not_pin(replicas):
+    response, read = call_middleware(write=True, method='get')
+    assert PIN_COOKIE not in response.cookies, (
+        'Убедитесь, что служебные записи при просмотре страницы (сессия, '
+        'last_login) не привязывают пользователя к основной базе.'
+    )
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_category):
+    return {
+        'title_match': mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title='Путешествие на Байкал', text='Заметки о поездке.',
+        ),
+        'text_match': mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title='Лето', text='Мы снова были на Байкале <b>летом</b>.',
+        ),
+        'draft': mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title='Байкал зимой', text='Черновик.', is_published=False,
+        ),
+        'scheduled': mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title='Байкал весной', text='Скоро.',
+            pub_date=timezone.now() + timedelta(days=1),
+        ),
+    }
+
+
+def search(client, query):
+    response = client.get('/search/', {'q': query})
+    assert response.status_code == 200
+    return response
+
+
+def test_search_ranks_visible_posts(client, searchable_posts):
+    response = search(client, 'байкал')
+    found = [post.id for post in response.context['page_obj']]
+    assert found == [
+        searchable_posts['title_match'].id,
+        searchable_posts['text_match'].id,
+    ], (
+        'Убедитесь, что поиск находит только опубликованные посты, '
+        'а совпадения в заголовке ранжируются выше.'
+    )
+
+
+def test_search_snippet_is_escaped_and_highlighted(client, searchable_posts):
+    content = search(client, 'летом').content.decode('utf-8')
+    assert '<mark>летом</mark>' in content
+    assert '&lt;b&gt;' in content
+
+
+def test_search_follows_post_changes(client, searchable_posts):
+    post = searchable_posts['text_match']
+    post.text = 'Совсем другой текст'
+    post.save()
+    assert len(search(client, 'летом').context['page_obj']) == 0
+
+    post.delete()
+    assert len(search(client, 'другой').context['page_obj']) == 0
+
+
+def test_search_ignores_query_syntax(client, searchable_posts):
+    search(client, '" OR NEAR(')
+
+
+def test_rebuild_search_index(client, searchable_posts):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM blog_post_fts')
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert len(search(client, 'байкал').context['page_obj']) == 2
+
+
+def test_admin_search_limited(settings, admin_client, searchable_posts):
+    settings.BLOG_SEARCH_MAX_RESULTS = 2
+    response = admin_client.get('/admin/blog/post/', {'q': 'Байкал'})
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 2, (
+        'Убедитесь, что поиск в админке ограничен '
+        'BLOG_SEARCH_MAX_RESULTS результатами.'
+    )
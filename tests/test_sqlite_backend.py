@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+from django.db import connection
+
+from blogicum.sqlite.base import DatabaseWrapper
+
+WRITERS = 8
+READERS = 4
+INCREMENTS = 25
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_connection(tmp_path):
+    """Соединения с отдельной файловой базой: в памяти нет WAL."""
+    opened = []
+
+    def make(**overrides):
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': str(tmp_path / 'stress.sqlite3'),
+            **overrides,
+        }
+        wrapper = DatabaseWrapper(settings_dict)
+        opened.append(wrapper)
+        return wrapper
+
+    yield make
+    for wrapper in opened:
+        wrapper.inc_thread_sharing()
+        wrapper.close()
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_applied(make_connection):
+    wrapper = make_connection(PRAGMAS={'cache_size': -1000})
+    assert pragma(wrapper, 'journal_mode') == 'wal'
+    assert pragma(wrapper, 'synchronous') == 1, (
+        'Убедитесь, что для SQLite включён synchronous=NORMAL.'
+    )
+    assert pragma(wrapper, 'temp_store') == 2
+    assert pragma(wrapper, 'busy_timeout') == 5000
+    assert pragma(wrapper, 'cache_size') == -1000, (
+        'Убедитесь, что PRAGMAS из настроек переопределяют значения '
+        'по умолчанию.'
+    )
+
+
+def test_concurrent_writes_and_reads(make_connection):
+    setup = make_connection()
+    with setup.cursor() as cursor:
+        cursor.execute('CREATE TABLE counter (value INTEGER)')
+        cursor.execute('INSERT INTO counter VALUES (0)')
+    errors = []
+
+    def write():
+        wrapper = make_connection(TRANSACTION_MODE='IMMEDIATE')
+        try:
+            for _ in range(INCREMENTS):
+                # Чтение и запись в одной транзакции, как в add_comment
+                wrapper.set_autocommit(
+                    False, force_begin_transaction_with_broken_autocommit=True
+                )
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT value FROM counter')
+                    value = cursor.fetchone()[0]
+                    cursor.execute('UPDATE counter SET value = %s',
+                                   [value + 1])
+                wrapper.commit()
+                wrapper.set_autocommit(True)
+        except Exception as error:
+            errors.append(error)
+
+    def read():
+        wrapper = make_connection()
+        try:
+            for _ in range(INCREMENTS * 2):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT value FROM counter')
+                    cursor.fetchone()
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write) for _ in range(WRITERS)]
+    threads += [threading.Thread(target=read) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, (
+        'Убедитесь, что параллельные запись и чтение не приводят к '
+        f'ошибкам блокировки SQLite: {errors[:3]}'
+    )
+    with setup.cursor() as cursor:
+        cursor.execute('SELECT value FROM counter')
+        assert cursor.fetchone()[0] == WRITERS * INCREMENTS, (
+            'Убедитесь, что транзакции не теряют обновления.'
+        )
+
+
+def test_health_check_reconnects(make_connection, tmp_path):
+    wrapper = make_connection(HEALTH_CHECKS=True, CONN_MAX_AGE=None)
+    with wrapper.cursor() as cursor:
+        cursor.execute('CREATE TABLE marker (name TEXT)')
+        cursor.execute("INSERT INTO marker VALUES ('old')")
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    restored = tmp_path / 'restored.sqlite3'
+    with sqlite3.connect(restored) as other:
+        other.execute('CREATE TABLE marker (name TEXT)')
+        other.execute("INSERT INTO marker VALUES ('restored')")
+    other.close()
+
+    # Восстановление из копии подменяет файл базы
+    os.replace(restored, wrapper.settings_dict['NAME'])
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT name FROM marker')
+        assert cursor.fetchone()[0] == 'restored', (
+            'Убедитесь, что постоянное соединение переоткрывается, '
+            'если файл базы подменили.'
+        )
+
+    wrapper.connection.close()
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT 1')
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_stale_running_task_reclaimed(settings, published_category):
+    from blog.models import Task
+    from blog.tasks import claim_tasks, enqueue
+
+    queued = enqueue('sync_category_feed', category_id=published_category.pk)
+    assert claim_tasks(10) == [queued.pk]
+    assert claim_tasks(10) == [], (
+        'Убедитесь, что выполняющаяся задача не выдаётся повторно.'
+    )
+
+    # Воркер упал, не завершив задачу
+    stale_start = timezone.now() - timedelta(
+        seconds=settings.BLOG_TASK_TIMEOUT + 1
+    )
+    Task.objects.filter(pk=queued.pk).update(started_at=stale_start)
+    assert claim_tasks(10) == [queued.pk], (
+        'Убедитесь, что брошенная задача возвращается в очередь.'
+    )
+    queued.refresh_from_db()
+    assert queued.attempts == 2
+    assert queued.started_at > stale_start
+
+    settings.BLOG_TASK_MAX_ATTEMPTS = 2
+    Task.objects.filter(pk=queued.pk).update(started_at=stale_start)
+    assert claim_tasks(10) == []
+    queued.refresh_from_db()
+    assert queued.status == Task.FAILED, (
+        'Убедитесь, что задача, исчерпавшая попытки, помечается ошибкой.'
+    )
@@ -0,0 +1,122 @@
+import os
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import SkipFile, StopFutureHandlers
+from django.test import RequestFactory
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def image_upload(size=(400, 200), name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, (20, 40, 60)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def post_data(published_category):
+    return {
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'category': published_category.pk,
+        'pub_date': '2020-01-01T10:00',
+        'is_published': 'on',
+    }
+
+
+def form_errors(response):
+    return response.context['form'].errors
+
+
+def test_image_streamed_into_storage(media_root, user_client, post_data):
+    from blog.models import Post
+    from blog.storage import content_digest
+
+    upload = image_upload()
+    response = user_client.post(
+        '/posts/create/', {**post_data, 'image': upload}
+    )
+    assert response.status_code == 302, form_errors(response)
+    post = Post.objects.get()
+    upload.seek(0)
+    digest = content_digest(upload)
+    assert post.image.name == f'posts/{digest[:2]}/{digest}.png', (
+        'Убедитесь, что загруженное изображение сохраняется под хэшем '
+        'своего содержимого.'
+    )
+    assert post.image_width == 400
+    assert os.listdir(media_root / '.incoming') == [], (
+        'Убедитесь, что временный файл загрузки переносится в хранилище, '
+        'а не копируется.'
+    )
+
+
+def test_oversized_upload_rejected(
+        settings, media_root, user_client, post_data
+):
+    from blog.models import Post
+
+    settings.BLOG_UPLOAD_MAX_SIZE = 1024
+    response = user_client.post(
+        '/posts/create/',
+        {**post_data, 'image': image_upload(size=(800, 800))},
+    )
+    assert response.status_code == 200
+    assert 'не должен превышать' in str(form_errors(response)['image'])
+    assert not Post.objects.exists()
+
+
+def test_large_dimensions_rejected(
+        settings, media_root, user_client, post_data
+):
+    from blog.models import Post
+
+    settings.BLOG_UPLOAD_MAX_DIMENSION = 300
+    response = user_client.post(
+        '/posts/create/', {**post_data, 'image': image_upload()}
+    )
+    assert 'не должно быть больше' in str(form_errors(response)['image'])
+    assert not Post.objects.exists()
+
+
+def test_fields_after_rejected_image_kept(
+        settings, media_root, user_client, post_data
+):
+    settings.BLOG_UPLOAD_MAX_DIMENSION = 300
+    # Изображение — первым, остальные поля идут за ним
+    response = user_client.post(
+        '/posts/create/', {'image': image_upload(), **post_data}
+    )
+    errors = form_errors(response)
+    assert list(errors) == ['image'], (
+        'Убедитесь, что после отклонённого изображения разбираются '
+        'остальные поля формы.'
+    )
+    assert response.context['form']['title'].value() == post_data['title']
+
+
+def test_rejected_before_whole_file_is_read(settings, media_root):
+    from blog.uploads import PostImageUploadHandler
+
+    settings.BLOG_UPLOAD_MAX_DIMENSION = 300
+    request = RequestFactory().post('/posts/create/')
+    handler = PostImageUploadHandler(request)
+    handler.new_file('text', 'notes.txt', 'text/plain', None)
+    assert handler.receive_data_chunk(b'data', 0) == b'data'
+
+    data = image_upload().read()
+    with pytest.raises(StopFutureHandlers):
+        handler.new_file('image', 'photo.png', 'image/png', None)
+    with pytest.raises(SkipFile):
+        handler.receive_data_chunk(data[:handler.chunk_size], 0)
+    assert 'image' in request.upload_errors
+    assert os.listdir(media_root / '.incoming') == []